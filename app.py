@@ -1,15 +1,20 @@
 import uvicorn
+import asyncio
 import traceback
-from fastapi import FastAPI
+from fastapi import FastAPI, Depends
 from helpers.loog import logger
-from bedrock.stream import Streaming
+from helpers.metrics import metrics
+from helpers.authentication import verify_yang_auth_token
 import databases.models as db_models
 from contextlib import asynccontextmanager
 from helpers.config import AppConfig, AWSConfig, DatabaseConfig
 from fastapi.middleware.cors import CORSMiddleware
-from databases.database import engine, create_database_if_not_exists
+from databases.database import engine, create_database_if_not_exists, add_missing_columns
 from sqlalchemy.ext.asyncio import async_sessionmaker
 from databases.seeds import seed_initial_data
+from databases.registry import config_registry
+from helpers.secret import AWSSecretManager
+from bedrock.client import bedrock_clients
 
 from routers.user import router as user_router
 from routers.role import router as role_router
@@ -19,28 +24,40 @@ from routers.llm import router as llm_router
 from routers.agent import router as agent_router
 from routers.login import router as login_router
 from routers.chat import router as chat_router
+from routers.batch import router as batch_router
 from routers.tag import router as tag_router
 
 app_conf = AppConfig()
 aws_conf = AWSConfig()
 db_conf = DatabaseConfig()
-streaming = Streaming()
 SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
 
 # --- Startup ---
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     try:
+        # Fetch the secrets off the event loop, so the first authenticated request does not block it
+        try:
+            await asyncio.to_thread(AWSSecretManager().store.warm)
+            logger.info("🔑 Secret store loaded.")
+        except Exception as e:
+            logger.error(f"❌ Secret store warm-up failed: {e}")
+
         try:
             await create_database_if_not_exists()
             async with engine.begin() as conn:
                 await conn.run_sync(db_models.Base.metadata.create_all)
+                await conn.run_sync(add_missing_columns)
             logger.info("✅ Tables synchronized with models.")
 
             # --- Seeding initial data ---
             async with SessionLocal() as session:
                 await seed_initial_data(session)
             logger.info("🌱 Database seeding completed successfully.")
+
+            # --- Config registry (agents, llms, tools) ---
+            await config_registry.start()
+            logger.info("🗂️ Config registry loaded.")
         except Exception as e:
             logger.error(f"❌ Database initialization failed: {e}")
 
@@ -48,6 +65,7 @@ async def lifespan(app: FastAPI):
 
     finally:
         try:
+            await config_registry.stop()
             await engine.dispose()
             logger.info("🧹 Database connection closed.")
         except Exception as e:
@@ -72,6 +90,7 @@ app.include_router(llm_router)
 app.include_router(agent_router)
 app.include_router(login_router)
 app.include_router(chat_router)
+app.include_router(batch_router)
 app.include_router(tag_router)
 
 # ------------------- API Endpoint -------------------
@@ -79,5 +98,11 @@ app.include_router(tag_router)
 def health():
     return {"status": "ok"}
 
+@app.get("/metrics", dependencies=[Depends(verify_yang_auth_token)])
+def metrics_snapshot():
+    # Streams release their connection without a botocore event, so read the pools now
+    bedrock_clients.publish_pool_usage()
+    return metrics.snapshot()
+
 if __name__ == "__main__":
     uvicorn.run("app:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,192 @@
+import math
+import time
+import asyncio
+from collections import OrderedDict, deque
+from helpers.config import StreamConfig
+from helpers.metrics import metrics
+
+stream_conf = StreamConfig()
+
+class AdmissionRejected(Exception):
+    """The model's wait queue is full; retry after `retry_after` seconds."""
+
+    def __init__(self, llm_name: str, retry_after: int):
+        super().__init__(f"{llm_name} is busy, please retry shortly")
+        self.retry_after = retry_after
+
+class Slot(object):
+    """One admitted model stream. `release()` may be called more than once."""
+
+    def __init__(self, admission, background: bool = False):
+        self.admission = admission
+        self.background = background
+        self.acquired = time.monotonic()
+        self._released = False
+
+    def release(self):
+        if self._released:
+            return
+        self._released = True
+        metrics.observe("llm_slot_seconds", time.monotonic() - self.acquired, llm=self.admission.name)
+        self.admission._release(self.background)
+
+class ModelAdmission(object):
+    """
+    Concurrency limit for one LLM with a bounded, fair wait queue.
+
+    Up to `limit` streams run at once. Further requests wait in per-user FIFO
+    queues that are served round-robin, so one user sending a burst cannot push
+    everyone else to the back. Once `queue_size` requests are waiting, new ones
+    are rejected immediately with an estimated retry delay.
+
+    Background requests (batch jobs) queue separately without a size limit and
+    only get a slot while no interactive request is waiting, and never more than
+    `limit - reserved` slots at once, so live chat keeps some headroom.
+    """
+
+    def __init__(self, name: str, limit: int, queue_size: int, reserved: int = 0):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.reserved = reserved
+        self.active = 0
+        self.active_background = 0
+        self.waiting = 0
+        self._waiters = OrderedDict()  # user -> deque of futures, in round-robin order
+        self._background = deque()  # background futures, FIFO
+
+    def set_limit(self, limit: int):
+        if limit != self.limit:
+            self.limit = limit
+            self._dispatch()
+
+    def retry_after(self) -> int:
+        hold = metrics.percentile("llm_slot_seconds", 50, llm=self.name) or 1.0
+        return max(1, math.ceil(hold * (self.waiting + 1) / max(1, self.limit)))
+
+    def background_limit(self) -> int:
+        return max(1, self.limit - self.reserved)
+
+    async def acquire(self, user: str, background: bool = False) -> Slot:
+        if background:
+            return await self._acquire_background()
+
+        if self.active < self.limit and not self.waiting:
+            self.active += 1
+            self._publish()
+            metrics.observe("llm_queue_wait_seconds", 0.0, llm=self.name)
+            return Slot(self)
+
+        if self.waiting >= self.queue_size:
+            metrics.inc("llm_admission_rejected", llm=self.name)
+            raise AdmissionRejected(self.name, self.retry_after())
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(user, deque()).append(future)
+        self.waiting += 1
+        self._publish()
+        started = time.monotonic()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # A slot was handed over just as the caller went away
+                self._release()
+            else:
+                self._remove(user, future)
+            raise
+        metrics.observe("llm_queue_wait_seconds", time.monotonic() - started, llm=self.name)
+        return Slot(self)
+
+    async def _acquire_background(self) -> Slot:
+        if not self.waiting and not self._background and self.active < self.limit \
+                and self.active_background < self.background_limit():
+            self.active += 1
+            self.active_background += 1
+            self._publish()
+            return Slot(self, background=True)
+
+        future = asyncio.get_running_loop().create_future()
+        self._background.append(future)
+        self._publish()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release(background=True)
+            elif future in self._background:
+                self._background.remove(future)
+                self._publish()
+            raise
+        return Slot(self, background=True)
+
+    def _remove(self, user: str, future):
+        queue = self._waiters.get(user)
+        if queue and future in queue:
+            queue.remove(future)
+            if not queue:
+                del self._waiters[user]
+            self.waiting -= 1
+            self._publish()
+
+    def _release(self, background: bool = False):
+        self.active -= 1
+        if background:
+            self.active_background -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        while self.active < self.limit and self._waiters:
+            user, queue = next(iter(self._waiters.items()))
+            future = queue.popleft()
+            if queue:
+                self._waiters.move_to_end(user)
+            else:
+                del self._waiters[user]
+            self.waiting -= 1
+            if future.done():
+                continue
+            self.active += 1
+            future.set_result(None)
+
+        # Interactive requests always go first
+        while self._background and not self._waiters and self.active < self.limit \
+                and self.active_background < self.background_limit():
+            future = self._background.popleft()
+            if future.done():
+                continue
+            self.active += 1
+            self.active_background += 1
+            future.set_result(None)
+        self._publish()
+
+    def _publish(self):
+        metrics.set_gauge("llm_active_streams", self.active, llm=self.name)
+        metrics.set_gauge("llm_queue_depth", self.waiting, llm=self.name)
+        metrics.set_gauge("llm_background_streams", self.active_background, llm=self.name)
+        metrics.set_gauge("llm_background_queue_depth", len(self._background), llm=self.name)
+
+class LLMAdmission(object):
+    """One `ModelAdmission` per LLM name; limits follow the LLM row's `max_concurrency`."""
+
+    def __init__(self, default_limit: int, queue_size: int, reserved: int):
+        self.default_limit = default_limit
+        self.queue_size = queue_size
+        self.reserved = reserved
+        self._models = {}
+
+    async def acquire(self, db_llm, user: str, background: bool = False) -> Slot:
+        limit = max(1, int(getattr(db_llm, "max_concurrency", None) or self.default_limit))
+        admission = self._models.get(db_llm.name)
+        if admission is None:
+            admission = ModelAdmission(db_llm.name, limit, self.queue_size, self.reserved)
+            self._models[db_llm.name] = admission
+        else:
+            admission.set_limit(limit)
+        return await admission.acquire(user or "-", background=background)
+
+llm_admission = LLMAdmission(
+    default_limit=int(stream_conf.stream_model_concurrency),
+    queue_size=int(stream_conf.stream_model_queue_size),
+    reserved=int(stream_conf.stream_batch_reserved_slots),
+)
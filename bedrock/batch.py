@@ -0,0 +1,95 @@
+import time
+import asyncio
+import traceback
+from contextlib import aclosing
+from typing import AsyncGenerator, AsyncIterator, Callable, List, Tuple
+from helpers.loog import logger
+from helpers.metrics import metrics
+
+class BatchRunner(object):
+    """
+    Runs many non-interactive completions against one LLM or agent.
+
+    `concurrency` workers take items in order; each waits for a background
+    admission slot on the model (behind live chat, see `bedrock.admission`) and
+    goes through the same client-side quotas and retries as interactive streams.
+    Results are yielded as soon as each item completes, so their order follows
+    completion, not submission.
+    """
+
+    def __init__(self, streaming):
+        self.streaming = streaming
+
+    async def run(self, items: List[Tuple[str, Callable[[], AsyncIterator[dict]]]], model_name: str, user: str,
+                  concurrency: int) -> AsyncGenerator[dict, None]:
+        started = time.monotonic()
+        pending = iter(items)
+        results = asyncio.Queue()
+
+        async def worker():
+            for item_id, make_events in pending:
+                await results.put(await self._complete(item_id, make_events, model_name, user))
+
+        metrics.inc("batch_requests")
+        workers = [asyncio.ensure_future(worker()) for _ in range(max(1, min(concurrency, len(items))))]
+        succeeded = failed = 0
+        try:
+            for _ in range(len(items)):
+                result = await results.get()
+                if result["status"] == "ok":
+                    succeeded += 1
+                else:
+                    failed += 1
+                yield result
+        finally:
+            # Client gone or batch finished: stop whatever is still running
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        yield {
+            "type": "summary",
+            "succeeded": succeeded,
+            "failed": failed,
+            "seconds": round(time.monotonic() - started, 3),
+        }
+
+    async def _complete(self, item_id: str, make_events: Callable[[], AsyncIterator[dict]], model_name: str,
+                        user: str) -> dict:
+        """Run one item to completion and collapse its stream events into a single result."""
+        started = time.monotonic()
+        result = {"type": "result", "id": item_id, "status": "error", "code": "internal", "message": "No answer"}
+        slot = None
+        try:
+            slot = await self.streaming.admit(model_name, user, background=True)
+            text = []
+            async with aclosing(make_events()) as events:
+                async for event in events:
+                    kind = event.get("type")
+                    if kind == "text":
+                        text.append(event["text"])
+                    elif kind == "done":
+                        result = {
+                            "type": "result",
+                            "id": item_id,
+                            "status": "ok",
+                            "text": "".join(text),
+                            "finish_reason": event.get("finish_reason"),
+                            "usage": event.get("usage"),
+                        }
+                    elif kind == "error":
+                        result.update(code=event.get("code"), message=event.get("message"))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            result.update(code="internal", message=str(e))
+            logger.error(f"[Batch] item {item_id} failed: {e} \n TRACEBACK: {traceback.format_exc()}")
+        finally:
+            if slot is not None:
+                slot.release()
+
+        seconds = time.monotonic() - started
+        result["seconds"] = round(seconds, 3)
+        metrics.inc("batch_items", status=result["status"])
+        metrics.observe("batch_item_seconds", seconds)
+        return result
@@ -0,0 +1,72 @@
+import json
+import time
+import hashlib
+from collections import OrderedDict
+from typing import List, Optional
+from helpers.config import StreamConfig
+from helpers.metrics import metrics
+from bedrock.resume import EVENT_OVERHEAD_BYTES
+
+stream_conf = StreamConfig()
+
+def cache_key(**parts) -> str:
+    """Stable hash of everything that determines a completion (model, sampling, prompt, messages)."""
+    raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=repr)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class ResponseCache(object):
+    """
+    Exact-match cache of complete answers, as the stream events that produced
+    them. Entries expire after `ttl` seconds; beyond `max_bytes` the least
+    recently used ones are evicted.
+    """
+
+    def __init__(self, ttl: float, max_bytes: int):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (expires at, events, size), least recently used first
+        self._bytes = 0
+
+    def get(self, key: str, kind: str = "-") -> Optional[List[dict]]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= time.monotonic():
+            self._drop(key)
+            entry = None
+        if entry is None:
+            metrics.inc("response_cache_misses", kind=kind)
+            return None
+        self._entries.move_to_end(key)
+        metrics.inc("response_cache_hits", kind=kind)
+        return entry[1]
+
+    def put(self, key: str, events: List[dict]):
+        size = sum(len(event.get("text", "").encode("utf-8")) + EVENT_OVERHEAD_BYTES for event in events)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (time.monotonic() + self.ttl, events, size)
+        self._bytes += size
+
+        now = time.monotonic()
+        for old_key, (expires_at, _, _) in list(self._entries.items()):
+            if expires_at <= now:
+                self._drop(old_key)
+        while self._bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+            metrics.inc("response_cache_evictions")
+        self._publish()
+
+    def _drop(self, key: str):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+        self._publish()
+
+    def _publish(self):
+        metrics.set_gauge("response_cache_bytes", self._bytes)
+        metrics.set_gauge("response_cache_entries", len(self._entries))
+
+response_cache = ResponseCache(
+    ttl=float(stream_conf.stream_cache_ttl_seconds),
+    max_bytes=int(stream_conf.stream_cache_max_bytes),
+)
@@ -0,0 +1,90 @@
+import boto3
+import threading
+from botocore.config import Config
+from helpers.config import AWSConfig
+from helpers.metrics import metrics
+
+class BedrockClientRegistry(object):
+    """
+    Process-wide registry of boto3 clients keyed by (service, region).
+
+    boto3 clients are thread-safe, so every request reuses the same client and
+    its urllib3 connection pool instead of resolving credentials and opening a
+    fresh HTTPS pool per call.
+
+    Pool utilisation is published as `bedrock_pool_in_use` next to
+    `bedrock_pool_size`, per (service, region). It counts the connections
+    checked out of the client's urllib3 pools, so a ConverseStream holds its
+    connection until the stream body is closed, and covers model, tool
+    (knowledge base) and embedding calls alike. It is refreshed after every
+    response and whenever `/metrics` is read.
+    """
+
+    def __init__(self):
+        self.aws_conf = AWSConfig()
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def _build_config(self, service: str) -> Config:
+        retries = {"mode": self.aws_conf.bedrock_retry_mode, "max_attempts": int(self.aws_conf.bedrock_max_attempts)}
+        if service == "bedrock-runtime":
+            # Model calls are retried and failed over by the stream layer, botocore retries would multiply them
+            retries = {"mode": self.aws_conf.bedrock_retry_mode, "total_max_attempts": int(self.aws_conf.bedrock_runtime_max_attempts)}
+        return Config(
+            max_pool_connections=int(self.aws_conf.bedrock_max_pool_connections),
+            tcp_keepalive=True,
+            connect_timeout=int(self.aws_conf.bedrock_connect_timeout),
+            read_timeout=int(self.aws_conf.bedrock_read_timeout),
+            retries=retries,
+        )
+
+    def get(self, service: str, region: str = None):
+        region = region or self.aws_conf.aws_region
+        key = (service, region)
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = boto3.session.Session().client(
+                    service_name=service,
+                    region_name=region,
+                    config=self._build_config(service),
+                )
+                client.meta.events.register("response-received", lambda **kwargs: self._publish_pool(service, region, client))
+                self._clients[key] = client
+                metrics.inc("bedrock_client_created", service=service, region=region)
+                metrics.set_gauge("bedrock_pool_size", int(self.aws_conf.bedrock_max_pool_connections), service=service, region=region)
+                self._publish_pool(service, region, client)
+        return client
+
+    @staticmethod
+    def _pool_in_use(client):
+        """Connections checked out of a client's urllib3 pools, or None when botocore does not expose them."""
+        session = getattr(getattr(client, "_endpoint", None), "http_session", None)
+        managers = [getattr(session, "_manager", None), *getattr(session, "_proxy_managers", {}).values()]
+        if managers[0] is None:
+            return None
+        in_use = 0
+        for manager in managers:
+            for pool_key in manager.pools.keys():
+                pool = manager.pools.get(pool_key)
+                # Each pool starts as a queue of `maxsize` free slots; a checkout takes one
+                queue = getattr(pool, "pool", None)
+                if queue is not None:
+                    in_use += queue.maxsize - queue.qsize()
+        return in_use
+
+    def _publish_pool(self, service: str, region: str, client):
+        in_use = self._pool_in_use(client)
+        if in_use is not None:
+            metrics.set_gauge("bedrock_pool_in_use", in_use, service=service, region=region)
+
+    def publish_pool_usage(self):
+        """Refresh `bedrock_pool_in_use` for every client, e.g. before a metrics snapshot."""
+        for (service, region), client in list(self._clients.items()):
+            self._publish_pool(service, region, client)
+
+bedrock_clients = BedrockClientRegistry()
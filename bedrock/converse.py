@@ -1,12 +1,14 @@
-import boto3
-from langchain_aws import ChatBedrockConverse
 from helpers.config import AppConfig, AWSConfig
+from bedrock.client import bedrock_clients
 
 class Converse():
     def __init__(self):
         self.aws_conf = AWSConfig()
     
     def build_converse(self, llm):
+        # langchain_aws is heavy, only pay for it once the first model is built
+        from langchain_aws import ChatBedrockConverse
+
         guardrails = None
         if llm.guardrail_id and llm.guardrail_version:
             guardrails = {
@@ -15,7 +17,7 @@ class Converse():
             }
 
         converse = ChatBedrockConverse(
-            client=boto3.client("bedrock-runtime", region_name=llm.region),
+            client=bedrock_clients.get("bedrock-runtime", llm.region),
             model=llm.model_id,
             temperature=float(llm.model_temperature),
             max_tokens=int(llm.model_max_tokens),
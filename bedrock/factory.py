@@ -1,35 +1,134 @@
 import os
 import json
-from databases.crud import get_enabled_tools
-from databases.database import SessionLocal
+import time
+import asyncio
+import importlib
+import threading
+from string import Template
+from collections.abc import Mapping
+from datetime import datetime, timezone
+from helpers.loog import logger
+from helpers.config import AppConfig
+from databases.crud import get_config_version
+from databases.registry import config_registry
 from bedrock.converse import Converse
-from langchain.agents import create_agent
-from tools.web_search import (
-    DuckDuckGo,
-    Arxiv,
-    Wikipedia,
-    GoogleSearch,
-    GoogleScholar,
-    GoogleTrends,
-    AskNews,
-    RedditSearch,
-    SearxSearch,
-    OpenWeather,
-)
 
-TOOL_CLASS_MAP = {
-    "duckduckgo": DuckDuckGo,
-    "arxiv": Arxiv,
-    "wikipedia": Wikipedia,
-    "google_search": GoogleSearch,
-    "google_scholar": GoogleScholar,
-    "google_trends": GoogleTrends,
-    "asknews": AskNews,
-    "reddit": RedditSearch,
-    "searx": SearxSearch,
-    "openweather": OpenWeather
-}
-from databases.crud import get_llm_by_name, get_agent_by_name
+app_conf = AppConfig()
+
+class LazyToolMap(Mapping):
+    """Tool name -> LangChain tool, imported from "module:attribute" on first lookup."""
+
+    def __init__(self, paths: dict):
+        self._paths = paths
+        self._loaded = {}
+
+    def __getitem__(self, name):
+        if name not in self._loaded:
+            module_name, attr = self._paths[name].split(":")
+            self._loaded[name] = getattr(importlib.import_module(module_name), attr)
+        return self._loaded[name]
+
+    def __iter__(self):
+        return iter(self._paths)
+
+    def __len__(self):
+        return len(self._paths)
+
+TOOL_CLASS_MAP = LazyToolMap({
+    "duckduckgo": "tools.web_search:DuckDuckGo",
+    "arxiv": "tools.web_search:Arxiv",
+    "wikipedia": "tools.web_search:Wikipedia",
+    "google_search": "tools.web_search:GoogleSearch",
+    "google_scholar": "tools.web_search:GoogleScholar",
+    "google_trends": "tools.web_search:GoogleTrends",
+    "asknews": "tools.web_search:AskNews",
+    "reddit": "tools.web_search:RedditSearch",
+    "searx": "tools.web_search:SearxSearch",
+    "openweather": "tools.web_search:OpenWeather",
+    "meta_search": "tools.meta_search:MetaSearch"
+})
+
+class PromptRegistry(object):
+    """
+    In-memory registry of every prompt file in `prompts/`.
+
+    Files are read once and kept as precompiled `string.Template`s. At most once
+    per `reload_interval` seconds the directory is re-scanned and any file whose
+    mtime changed is re-read; the whole mapping is swapped in one assignment so
+    readers never see a half-reloaded set.
+    """
+
+    def __init__(self, prompt_dir: str, reload_interval: float):
+        self.prompt_dir = prompt_dir
+        self.reload_interval = reload_interval
+        self._prompts = {}  # name -> (mtime, raw text, template)
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _scan(self):
+        prompts = {}
+        for filename in os.listdir(self.prompt_dir):
+            if not filename.endswith(".txt"):
+                continue
+            name = filename[:-len(".txt")]
+            path = os.path.join(self.prompt_dir, filename)
+            current = self._prompts.get(name)
+            try:
+                mtime = os.stat(path).st_mtime_ns
+                if current and current[0] == mtime:
+                    prompts[name] = current
+                    continue
+
+                with open(path, "r", encoding="utf-8") as f:
+                    text = f.read().strip()
+            except FileNotFoundError:
+                continue  # removed since listdir
+            prompts[name] = (mtime, text, Template(text))
+            if current:
+                logger.info(f"[PromptRegistry] Reloaded prompt '{name}'")
+
+        self._prompts = prompts
+
+    def _refresh(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return
+        with self._lock:
+            if now - self._checked_at < self.reload_interval:
+                return
+            self._scan()
+            self._checked_at = now
+
+    def get(self, name: str) -> str:
+        """Return the raw text of a prompt."""
+        self._refresh()
+        prompt = self._prompts.get(name)
+        if prompt is None:
+            raise FileNotFoundError(f"[Agent] Prompt file not found: {os.path.join(self.prompt_dir, name + '.txt')}")
+        return prompt[1]
+
+    def render(self, name: str, **variables) -> str:
+        """
+        Render a prompt template. `$current_date` and `$current_datetime` are always
+        available; unknown placeholders are left untouched.
+        """
+        self._refresh()
+        prompt = self._prompts.get(name)
+        if prompt is None:
+            raise FileNotFoundError(f"[Agent] Prompt file not found: {os.path.join(self.prompt_dir, name + '.txt')}")
+
+        now = datetime.now(timezone.utc)
+        values = {
+            "current_date": now.strftime("%Y-%m-%d"),
+            "current_datetime": now.strftime("%Y-%m-%d %H:%M:%S %Z"),
+        }
+        values.update({k: v for k, v in variables.items() if v is not None})
+        return prompt[2].safe_substitute(values)
+
+prompt_registry = PromptRegistry(
+    prompt_dir=os.path.join(os.path.dirname(__file__), "../prompts"),
+    reload_interval=float(app_conf.app_prompt_reload_interval),
+)
 
 class PromptFactory:
     def __init__(self):
@@ -37,59 +136,99 @@ class PromptFactory:
     
     def load_agent_prompt() -> str:
         """Load system prompt for the agent."""
-        prompt_path = os.path.join(os.path.dirname(__file__), "../prompts/agent-prompt.txt")
-        if not os.path.exists(prompt_path):
-            raise FileNotFoundError(f"[Agent] Prompt file not found: {prompt_path}")
-        with open(prompt_path, "r", encoding="utf-8") as f:
-            return f.read().strip()
+        return prompt_registry.get("agent-prompt")
         
-    def load_llm_prompt() -> str:
-        """Load system prompt for the llm."""
-        prompt_path = os.path.join(os.path.dirname(__file__), "../prompts/llm-prompt.txt")
-        if not os.path.exists(prompt_path):
-            raise FileNotFoundError(f"[Agent] Prompt file not found: {prompt_path}")
-        with open(prompt_path, "r", encoding="utf-8") as f:
-            return f.read().strip()
+    def load_llm_prompt(**variables) -> str:
+        """Load system prompt for the llm, rendered with request variables such as `$user_id` and `$chat_session_id`."""
+        return prompt_registry.render("llm-prompt", **variables)
+
+    def llm_prompt_cache_parts() -> dict:
+        """
+        The llm prompt as far as it determines an answer, for response cache keys:
+        the unrendered template and today's date. Per-session variables such as
+        `$user_id` are left out, or every key would be unique to its session.
+        """
+        return {
+            "template": prompt_registry.get("llm-prompt"),
+            "date": datetime.now(timezone.utc).strftime("%Y-%m-%d"),
+        }
         
 class AgentFactory:
     """Factory for creating LangChain agents with dynamically enabled tools."""
 
     def __init__(self):
         self.chat_converse = Converse()
-        self.GENERAL_ASSISTANT_PROMPT = PromptFactory.load_agent_prompt()
+        # Compiled agents keyed by (agent name, model name, config version)
+        self._agent_cache = {}
+        self._agent_cache_version = get_config_version()
+        self._agent_build_lock = asyncio.Lock()
 
     async def get_enabled_tools(self):
-        """Fetch all enabled tools from the DB and return a list of tool classes."""
+        """Fetch all enabled tools from the config registry and return a list of tool classes."""
         tools = []
-        async with SessionLocal() as session:
-            db_tools = await get_enabled_tools(session)
-
-            for t in db_tools:
-                tool_cls = TOOL_CLASS_MAP.get(t.name)
-                if tool_cls:
-                    tools.append(tool_cls)
+        for t in await config_registry.get_enabled_tools():
+            tool_cls = TOOL_CLASS_MAP.get(t.name)
+            if tool_cls:
+                tools.append(tool_cls)
 
         return tools
     
     async def get_llm(self, model_name: str):
-        """Fetch the LLM from the database and return it."""
-        async with SessionLocal() as session:
-            llm = await get_llm_by_name(session, model_name)
-        
-        return llm
+        """Fetch the LLM from the config registry and return it."""
+        return await config_registry.get_llm(model_name)
 
     async def get_agent(self, agent_name: str):
-        """Fetch the agent from the database and return it."""
-        async with SessionLocal() as session:
-            agent = await get_agent_by_name(session, agent_name)
-        
-        return agent
+        """Fetch the agent from the config registry and return it."""
+        return await config_registry.get_agent(agent_name)
     
+    async def model_candidates(self, agent_name: str, model_name: str):
+        """
+        The requested LLM followed by the agent's other enabled LLMs in `llm_ids`
+        order, used as the fallback chain when a model is throttled.
+        """
+        agent = await self.get_agent((agent_name or "").lower())
+        llm = await self.get_llm((model_name or "").lower())
+        if not agent or not llm:
+            return []
+
+        agent_llm_ids = [str(item['id']) for item in agent.llm_ids or []]
+        if str(llm.id) not in agent_llm_ids:
+            return []
+
+        candidates = [llm]
+        for llm_id in agent_llm_ids:
+            fallback = await config_registry.get_llm_by_id(llm_id)
+            if fallback and fallback.status == "enable" and fallback.id != llm.id:
+                candidates.append(fallback)
+        return candidates
+
     async def agent(self, agent_name: str, model_name: str):
-        """Create and return an LLM agent with appropriate model and tools."""
+        """Return a compiled LLM agent, building it once per configuration version."""
         agent_name = (agent_name or "").lower()
         model_name = (model_name or "").lower()
-        
+
+        version = get_config_version()
+        if version != self._agent_cache_version:
+            # Agent, LLM or tool rows changed, drop everything compiled before
+            self._agent_cache.clear()
+            self._agent_cache_version = version
+
+        key = (agent_name, model_name, version)
+        compiled = self._agent_cache.get(key)
+        if compiled is not None:
+            return compiled
+
+        async with self._agent_build_lock:
+            compiled = self._agent_cache.get(key)
+            if compiled is None:
+                compiled = await self.build_agent(agent_name, model_name)
+                if compiled is not None and version == get_config_version():
+                    self._agent_cache[key] = compiled
+
+        return compiled
+
+    async def build_agent(self, agent_name: str, model_name: str):
+        """Create and return an LLM agent with appropriate model and tools."""
         agent = await self.get_agent(agent_name)
         if not agent:
             return None
@@ -113,6 +252,8 @@ class AgentFactory:
         system_active_tool_names = {tool.name for tool in system_active_tools if tool is not None}
         active_tools = [tool for tool in agent_active_tools if tool and tool.name in system_active_tool_names]
         
+        from langchain.agents import create_agent
+
         agent = create_agent(
             system_prompt=agent.system_prompt,
             tools=active_tools,
@@ -125,20 +266,20 @@ class AgentFactory:
 class LLMFactory:
     def __init__(self):
         self.chat_converse = Converse()
-    
-    def llm(self, model_name: str):
-        """Create and return an LLM model."""
-        model_name = (model_name or "").lower()
+        # Chat models keyed by (LLM name, config version)
+        self._llm_cache = {}
+        self._llm_cache_version = get_config_version()
 
-        if model_name == "claude":
-            llm = self.chat_converse.claude_model_text()
-        elif model_name == "llama":
-            # llm = self.chat_converse.titan_model_text()
-            return None
-        elif model_name == "gpt-oss":
-            # llm = self.chat_converse.mistral_model_text()
-            return None
-        else:
-            raise ValueError(f"[Agent] Unsupported model: {model_name}")
-        
+    def llm(self, db_llm):
+        """Return the chat model for an LLM row, built once per configuration version."""
+        version = get_config_version()
+        if version != self._llm_cache_version:
+            self._llm_cache.clear()
+            self._llm_cache_version = version
+
+        key = (db_llm.name, version)
+        llm = self._llm_cache.get(key)
+        if llm is None:
+            llm = self.chat_converse.build_converse(db_llm)
+            self._llm_cache[key] = llm
         return llm
\ No newline at end of file
@@ -0,0 +1,146 @@
+import json
+import time
+import asyncio
+from typing import AsyncGenerator, AsyncIterator
+
+# Stream events produced by `Streaming` and consumed here:
+#   {"type": "text", "text": ...}
+#   {"type": "done", "finish_reason": ..., "usage": {...}}
+#   {"type": "error", "code": "not_found" | "throttled" | "internal" | "cancelled", "message": ...}
+#   {"type": "heartbeat"}  (added while the model is quiet)
+# Events delivered through `bedrock.resume` also carry an "id" (SSE Last-Event-ID).
+
+SSE_MEDIA_TYPE = "text/event-stream"
+TEXT_MEDIA_TYPE = "text/html"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # nginx must not buffer the stream
+}
+
+_END = object()
+
+async def coalesce(events: AsyncIterator[dict], window: float, max_chars: int, heartbeat: float = None,
+                   queue_size: int = 0) -> AsyncGenerator[dict, None]:
+    """
+    Merge consecutive text events into one until `max_chars` is reached or the
+    first of them has waited `window` seconds. With `heartbeat`, a heartbeat
+    event is emitted when nothing has been emitted for that many seconds (e.g.
+    the agent is in a long tool call) so proxies keep the connection open.
+
+    `events` is consumed by a separate task through a queue of at most
+    `queue_size` events (0 = unbounded), so a consumer that stops pulling also
+    stops the upstream. Cancelling the consumer of this generator closes
+    `events`, which stops the model stream and its tool calls.
+    """
+    queue = asyncio.Queue(maxsize=queue_size)
+
+    async def pump():
+        try:
+            async for event in events:
+                await queue.put(event)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await queue.put({"type": "error", "code": "internal", "message": str(e)})
+        finally:
+            # Close the upstream generator now rather than whenever it is collected
+            if hasattr(events, "aclose"):
+                await events.aclose()
+        await queue.put(_END)
+
+    producer = asyncio.ensure_future(pump())
+    buffer = []
+    size = 0
+    first_at = None
+    last_sent = time.monotonic()
+
+    try:
+        while True:
+            now = time.monotonic()
+            if buffer:
+                timeout = max(0.0, window - (now - first_at))
+            elif heartbeat:
+                timeout = max(0.0, heartbeat - (now - last_sent))
+            else:
+                timeout = None
+
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                if buffer:
+                    yield {"type": "text", "text": "".join(buffer)}
+                    buffer, size, first_at = [], 0, None
+                else:
+                    yield {"type": "heartbeat"}
+                last_sent = time.monotonic()
+                continue
+
+            if event is not _END and event.get("type") == "text":
+                if first_at is None:
+                    first_at = time.monotonic()
+                buffer.append(event["text"])
+                size += len(event["text"])
+                if size < max_chars:
+                    continue
+
+            if buffer:
+                yield {"type": "text", "text": "".join(buffer)}
+                buffer, size, first_at = [], 0, None
+                last_sent = time.monotonic()
+
+            if event is _END:
+                break
+            if event.get("type") != "text":
+                yield event
+                last_sent = time.monotonic()
+    finally:
+        producer.cancel()
+
+def sse_frame(event: dict) -> str:
+    """Render a stream event as a Server-Sent Events frame."""
+    kind = event.get("type")
+    if kind == "heartbeat":
+        return ": keep-alive\n\n"
+
+    data = {k: v for k, v in event.items() if k not in ("type", "id")}
+    name = "token" if kind == "text" else kind
+    frame = f"event: {name}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+    if event.get("id"):
+        frame = f"id: {event['id']}\n" + frame
+    return frame
+
+def ws_frame(event: dict, turn_id: str, chat_id: str) -> dict:
+    """Render a stream event as a WebSocket JSON message of one chat turn."""
+    message = {k: v for k, v in event.items() if k not in ("type", "id")}
+    message["type"] = "token" if event.get("type") == "text" else event.get("type")
+    message["id"] = turn_id
+    message["chat_session_id"] = chat_id
+    if event.get("id"):
+        message["event_id"] = event["id"]
+    return message
+
+def ndjson_frame(message: dict) -> str:
+    """Render a message as one line of newline-delimited JSON."""
+    return json.dumps(message, ensure_ascii=False) + "\n"
+
+def text_frame(event: dict) -> str:
+    """Render a stream event for plain-text clients, matching the original text/html output."""
+    kind = event.get("type")
+    if kind == "text":
+        return event["text"]
+    if kind == "done":
+        return "\n"
+    if kind == "error":
+        if event.get("code") == "not_found":
+            return event["message"]
+        return f"\n[Error] {event['message']}"
+    return ""
+
+async def render(events: AsyncIterator[dict], sse: bool) -> AsyncGenerator[str, None]:
+    frame = sse_frame if sse else text_frame
+    async for event in events:
+        data = frame(event)
+        if data:
+            yield data
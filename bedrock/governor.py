@@ -0,0 +1,156 @@
+import time
+import random
+import asyncio
+from helpers.config import StreamConfig
+from helpers.metrics import metrics
+
+stream_conf = StreamConfig()
+
+# Bedrock errors that mean "try again later or elsewhere", not "this request is wrong"
+RETRYABLE_ERRORS = (
+    "ThrottlingException",
+    "ModelNotReadyException",
+    "ServiceUnavailableException",
+    "TooManyRequestsException",
+    "ServiceQuotaExceededException",
+)
+
+class QuotaExceeded(Exception):
+    """The client-side quota for a model cannot admit the request soon enough."""
+
+def is_retryable(error: BaseException) -> bool:
+    """True for throttling-type errors, looking through LangChain's exception wrapping."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, QuotaExceeded):
+            return True
+        code = (getattr(error, "response", None) or {}).get("Error", {}).get("Code")
+        if code in RETRYABLE_ERRORS or type(error).__name__ in RETRYABLE_ERRORS:
+            return True
+        if any(name in str(error) for name in RETRYABLE_ERRORS):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+def estimate_tokens(message: dict) -> int:
+    """Rough input size of a chat payload, ~4 characters per token."""
+    chars = 0
+    for msg in message.get("messages", []):
+        for part in msg.get("content", []):
+            if isinstance(part, dict):
+                chars += len(part.get("text") or "")
+    return chars // 4 + 1
+
+class TokenBucket(object):
+    """Refills `per_minute` units evenly over a minute; may go into debt when actual use exceeds a reservation."""
+
+    def __init__(self, per_minute: float):
+        self.per_minute = per_minute
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.per_minute, self.level + (now - self.updated) * self.per_minute / 60)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        self._refill()
+        amount = min(amount, self.per_minute)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) * 60 / self.per_minute
+
+    def take(self, amount: float):
+        """Negative amounts give back an unused reservation."""
+        self._refill()
+        self.level = min(self.per_minute, self.level - amount)
+
+class Reservation(object):
+    def __init__(self, governor, tokens: int):
+        self.governor = governor
+        self.tokens = tokens
+
+    def settle(self, requests: int, tokens: int):
+        """Charge what the stream really used beyond the initial reservation, or refund the unused part."""
+        self.governor.charge(max(0, requests - 1), tokens - self.tokens)
+
+class ModelGovernor(object):
+    """
+    Client-side requests-per-minute and tokens-per-minute quota for one
+    (model id, region). A request reserves one request plus its estimated
+    input and its max output tokens, the way Bedrock itself counts TPM, and
+    waits up to `max_wait` seconds for capacity before giving up.
+
+    Capacity is taken up front, going into debt, so each caller sleeps on its
+    own until its turn while later callers see the queue ahead of them in the
+    debt and give up straight away when it is too long.
+    """
+
+    def __init__(self, name: str, rpm: float, tpm: float, max_wait: float):
+        self.name = name
+        self.max_wait = max_wait
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+
+    def set_quotas(self, rpm: float, tpm: float):
+        if (self.requests.per_minute if self.requests else 0) != rpm:
+            self.requests = TokenBucket(rpm) if rpm > 0 else None
+        if (self.tokens.per_minute if self.tokens else 0) != tpm:
+            self.tokens = TokenBucket(tpm) if tpm > 0 else None
+
+    async def reserve(self, tokens: int) -> Reservation:
+        # No await between computing the wait and taking the capacity, so arrival order is kept
+        wait = max(
+            self.requests.wait_time(1) if self.requests else 0.0,
+            self.tokens.wait_time(tokens) if self.tokens else 0.0,
+        )
+        if wait > self.max_wait:
+            metrics.inc("model_quota_exceeded", model=self.name)
+            raise QuotaExceeded(f"Client-side quota for {self.name} is exhausted")
+        self.charge(1, tokens)
+
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                self.charge(-1, -tokens)
+                raise
+        metrics.observe("model_quota_wait_seconds", wait, model=self.name)
+        return Reservation(self, tokens)
+
+    def charge(self, requests: int, tokens: int):
+        if self.requests and requests:
+            self.requests.take(requests)
+        if self.tokens and tokens:
+            self.tokens.take(tokens)
+
+class ModelGovernors(object):
+    """One `ModelGovernor` per (model id, region); quotas follow the LLM row."""
+
+    def __init__(self, max_wait: float):
+        self.max_wait = max_wait
+        self._governors = {}
+
+    def get(self, db_llm) -> ModelGovernor:
+        rpm = float(getattr(db_llm, "quota_rpm", None) or stream_conf.stream_default_rpm)
+        tpm = float(getattr(db_llm, "quota_tpm", None) or stream_conf.stream_default_tpm)
+        key = (db_llm.model_id, db_llm.region)
+        governor = self._governors.get(key)
+        if governor is None:
+            governor = ModelGovernor(f"{db_llm.model_id}@{db_llm.region}", rpm, tpm, self.max_wait)
+            self._governors[key] = governor
+        else:
+            governor.set_quotas(rpm, tpm)
+        return governor
+
+    async def reserve(self, db_llm, message: dict) -> Reservation:
+        tokens = estimate_tokens(message) + int(db_llm.model_max_tokens or 0)
+        return await self.get(db_llm).reserve(tokens)
+
+model_governors = ModelGovernors(max_wait=float(stream_conf.stream_quota_max_wait))
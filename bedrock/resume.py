@@ -0,0 +1,314 @@
+import time
+import uuid
+import asyncio
+from collections import OrderedDict
+from typing import AsyncGenerator, AsyncIterator, Awaitable, Callable
+from helpers.config import StreamConfig
+from helpers.metrics import metrics
+
+stream_conf = StreamConfig()
+
+# Rough per-event overhead on top of the text it carries, for the memory cap
+EVENT_OVERHEAD_BYTES = 64
+
+class ResumableStream(object):
+    """
+    One in-progress answer for a chat session.
+
+    A background task consumes the model events and appends them with sequence
+    numbers; HTTP responses follow the buffer from any sequence number, so a
+    client that reconnects with `Last-Event-ID` gets the rest of the answer
+    without the model being invoked again. When the last follower leaves before
+    the answer is complete, generation continues for `grace` seconds waiting for
+    a reconnect and is cancelled after that. An answer that is cancelled ends
+    with a "cancelled" error event, so followers can tell it was cut short.
+
+    Once a stream can no longer be resumed (it was not resumable to begin with,
+    or was evicted), events every follower has been handed are dropped.
+
+    The model runs ahead of slow clients, so it finishes and gives back its
+    connection and admission slot early. Generation only pauses when more than
+    `high_water` bytes are buffered but not yet delivered to any follower, until
+    followers have drained it to `low_water`.
+    """
+
+    def __init__(self, registry, session_id: str, grace: float, high_water: int, low_water: int):
+        self.registry = registry
+        self.session_id = session_id
+        self.stream_id = uuid.uuid4().hex[:12]
+        self.grace = grace
+        self.high_water = high_water
+        self.low_water = low_water
+        self.events = []  # buffered events, the first has sequence number `first_seq`
+        self.offsets = []  # bytes produced up to and including each buffered event
+        self.first_seq = 1
+        self.trimmed_bytes = 0  # bytes of the events dropped from the front
+        self.size = 0  # bytes of every event produced so far
+        self.delivered = 0  # highest sequence number handed to a follower
+        self.retained = True  # kept for resumes
+        self.terminated = False  # a done or error event was produced
+        self.done = False
+        self.finished_at = None
+        self.followers = 0
+        self.task = None
+        self._changed = asyncio.Event()
+        self._drained = asyncio.Event()
+        self._abandon_handle = None
+        self._positions = {}  # follower -> last sequence number it was handed
+
+    @property
+    def last_seq(self) -> int:
+        return self.first_seq + len(self.events) - 1
+
+    def event_id(self, seq: int) -> str:
+        return f"{self.stream_id}-{seq}"
+
+    def start(self, events: AsyncIterator[dict]):
+        self.task = asyncio.ensure_future(self._produce(events))
+
+    def cancel(self):
+        if self.task and not self.task.done():
+            self.task.cancel()
+
+    def undelivered(self) -> int:
+        if self.delivered < self.first_seq:
+            return self.size - self.trimmed_bytes
+        return self.size - self.offsets[self.delivered - self.first_seq]
+
+    def _append(self, event: dict):
+        self.events.append(event)
+        size = len(event.get("text", "").encode("utf-8")) + EVENT_OVERHEAD_BYTES
+        self.size += size
+        self.offsets.append(self.size)
+        if event.get("type") in ("done", "error"):
+            self.terminated = True
+        self.registry.track(self, size)
+        if not self.retained:
+            self._trim()
+        self._notify()
+
+    def _trim(self):
+        """Drop the events every follower has been handed; only for streams that cannot be resumed."""
+        # Before any follower has attached nothing has been delivered yet
+        upto = min(self._positions.values(), default=self.first_seq - 1)
+        count = upto - self.first_seq + 1
+        # In batches, so trimming costs O(1) per event amortized
+        if count <= 0 or count * 2 < len(self.events):
+            return
+        self.trimmed_bytes = self.offsets[count - 1]
+        del self.events[:count]
+        del self.offsets[:count]
+        self.first_seq += count
+
+    def release(self):
+        """The registry no longer keeps this stream for resumes."""
+        self.retained = False
+        self._trim()
+        if not self.followers and not self.done:
+            self._abandon()  # nobody can reconnect to it any more
+
+    async def _produce(self, events: AsyncIterator[dict]):
+        try:
+            async for event in events:
+                if event.get("type") == "heartbeat":
+                    continue
+                self._append(event)
+
+                # Without followers the answer is only buffered for a resume, keep going
+                if self.followers and self.undelivered() >= self.high_water:
+                    metrics.inc("stream_backpressure_pauses")
+                    started = time.monotonic()
+                    self._drained.clear()
+                    await self._drained.wait()
+                    metrics.observe("stream_backpressure_seconds", time.monotonic() - started)
+        finally:
+            if hasattr(events, "aclose"):
+                await events.aclose()
+            if not self.terminated:
+                self._append({"type": "error", "code": "cancelled", "message": "The answer was cancelled before it completed."})
+            self.done = True
+            self.finished_at = time.monotonic()
+            self._notify()
+            self.registry.evict()
+
+    def _notify(self):
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def _attach(self):
+        self.followers += 1
+        if self._abandon_handle:
+            self._abandon_handle.cancel()
+            self._abandon_handle = None
+
+    def _detach(self):
+        self.followers -= 1
+        if self.followers or self.done:
+            return
+        self._drained.set()
+        if self.grace > 0 and self.retained:
+            self._abandon_handle = asyncio.get_running_loop().call_later(self.grace, self._abandon)
+        else:
+            self._abandon()
+
+    def _abandon(self):
+        self._abandon_handle = None
+        if not self.followers and not self.done:
+            metrics.inc("stream_abandoned")
+            self.cancel()
+
+    async def follow(self, after: int, heartbeat: float, is_disconnected: Callable[[], Awaitable[bool]] = None,
+                     poll: float = 0.5) -> AsyncGenerator[dict, None]:
+        """
+        Yield the events after sequence number `after`, then new ones as they
+        arrive, until the answer is complete. Heartbeats are emitted while idle.
+        With `is_disconnected`, the client is checked every `poll` seconds and
+        following stops once it has gone.
+        """
+        follower = object()
+        self._positions[follower] = after
+        self._attach()
+        try:
+            next_seq = max(after + 1, self.first_seq)
+            last_sent = last_poll = time.monotonic()
+            while True:
+                while next_seq <= self.last_seq:
+                    yield dict(self.events[next_seq - self.first_seq], id=self.event_id(next_seq))
+                    self._positions[follower] = next_seq
+                    if not self.retained:
+                        self._trim()
+                    if next_seq > self.delivered:
+                        self.delivered = next_seq
+                        if self.undelivered() <= self.low_water:
+                            self._drained.set()
+                    next_seq += 1
+                    last_sent = time.monotonic()
+                if self.done:
+                    return
+
+                changed = self._changed
+                now = time.monotonic()
+                timeout = max(0.0, min(heartbeat - (now - last_sent), poll - (now - last_poll)))
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+
+                now = time.monotonic()
+                if is_disconnected and now - last_poll >= poll:
+                    last_poll = now
+                    if await is_disconnected():
+                        metrics.inc("stream_client_disconnects")
+                        return
+                if now - last_sent >= heartbeat:
+                    yield {"type": "heartbeat"}
+                    last_sent = now
+        finally:
+            del self._positions[follower]
+            self._detach()
+
+class ResumableStreams(object):
+    """
+    Latest stream per chat session, kept for `retention` seconds after it
+    completes. When the buffered events exceed `max_bytes`, completed streams
+    are dropped oldest first, then the oldest in-progress ones (they keep
+    streaming to their current client but can no longer be resumed).
+    """
+
+    def __init__(self, retention: float, max_bytes: int, grace: float, high_water: int, low_water: int):
+        self.retention = retention
+        self.max_bytes = max_bytes
+        self.grace = grace
+        self.high_water = high_water
+        self.low_water = low_water
+        self._streams = OrderedDict()  # session id -> stream, oldest first
+        self._bytes = 0
+
+    def start(self, session_id: str, events: AsyncIterator[dict], resumable: bool = True) -> ResumableStream:
+        """
+        Start consuming `events` for a session. A resumable stream replaces (and
+        cancels) the previous answer still running for the same session.
+        Non-resumable streams are not kept, leave the session's resumable stream
+        alone and stop as soon as their client leaves.
+        """
+        if resumable:
+            previous = self._streams.pop(session_id, None)
+            if previous is not None:
+                self._bytes -= previous.size
+                previous.cancel()
+
+        stream = ResumableStream(
+            self,
+            session_id,
+            grace=self.grace if resumable else 0,
+            high_water=self.high_water,
+            low_water=self.low_water,
+        )
+        if resumable:
+            self._streams[session_id] = stream
+        else:
+            stream.retained = False
+        stream.start(events)
+        self.evict()
+        return stream
+
+    def resume(self, session_id: str, last_event_id: str = None):
+        """
+        Return (stream, last seen sequence number) for a reconnecting client, or
+        None when the session has no buffered stream or `last_event_id` belongs
+        to an older answer.
+        """
+        self.evict()
+        stream = self._streams.get(session_id)
+        if stream is None:
+            metrics.inc("stream_resume_misses")
+            return None
+
+        after = 0
+        if last_event_id:
+            stream_id, _, seq = last_event_id.rpartition("-")
+            if stream_id != stream.stream_id or not seq.isdigit():
+                metrics.inc("stream_resume_misses")
+                return None
+            after = min(int(seq), stream.last_seq)
+
+        metrics.inc("stream_resumes")
+        return stream, after
+
+    def track(self, stream: ResumableStream, size: int):
+        if self._streams.get(stream.session_id) is not stream:
+            return  # not resumable, or already replaced or evicted
+        self._bytes += size
+        if self._bytes > self.max_bytes:
+            self.evict()
+
+    def evict(self):
+        now = time.monotonic()
+        for session_id, stream in list(self._streams.items()):
+            if stream.done and now - stream.finished_at >= self.retention:
+                self._drop(session_id)
+
+        if self._bytes > self.max_bytes:
+            completed = [sid for sid, s in self._streams.items() if s.done]
+            running = [sid for sid, s in self._streams.items() if not s.done]
+            for session_id in completed + running:
+                if self._bytes <= self.max_bytes:
+                    break
+                self._drop(session_id)
+                metrics.inc("stream_buffers_evicted")
+
+        metrics.set_gauge("stream_buffer_bytes", self._bytes)
+        metrics.set_gauge("stream_buffers", len(self._streams))
+
+    def _drop(self, session_id: str):
+        stream = self._streams.pop(session_id)
+        self._bytes -= stream.size
+        stream.release()
+
+resumable_streams = ResumableStreams(
+    retention=float(stream_conf.stream_resume_retention_seconds),
+    max_bytes=int(stream_conf.stream_resume_max_bytes),
+    grace=float(stream_conf.stream_resume_grace_seconds),
+    high_water=int(stream_conf.stream_buffer_high_water),
+    low_water=int(stream_conf.stream_buffer_low_water),
+)
@@ -1,14 +1,15 @@
-import boto3
 import asyncio
 from helpers.config import AppConfig, AWSConfig
-from langchain_aws.retrievers import AmazonKnowledgeBasesRetriever
+from bedrock.client import bedrock_clients
 
 class RetrieverKB(object):
     def __init__(self):
         self.aws_conf = AWSConfig()
-        self.bedrock_agent_runtime = boto3.client("bedrock-agent-runtime", region_name=self.aws_conf.aws_region)
+        self.bedrock_agent_runtime = bedrock_clients.get("bedrock-agent-runtime", self.aws_conf.aws_region)
 
     async def general_knowledge_base(self, query: str) -> list[str]:
+        from langchain_aws.retrievers import AmazonKnowledgeBasesRetriever
+
         def retrieve():
             retriever = AmazonKnowledgeBasesRetriever(
                 client=self.bedrock_agent_runtime,
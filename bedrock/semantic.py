@@ -0,0 +1,232 @@
+import re
+import json
+import time
+import asyncio
+import hashlib
+import traceback
+import numpy as np
+from typing import List, Optional, Tuple
+from helpers.config import AWSConfig, StreamConfig
+from helpers.loog import logger
+from helpers.metrics import metrics
+from bedrock.cache import cache_key
+
+stream_conf = StreamConfig()
+aws_conf = AWSConfig()
+
+class HashingEmbedder(object):
+    """
+    Offline embedder: signed feature hashing of words, word bigrams and
+    character trigrams into `dim` dimensions. Deterministic across processes
+    and free, but only catches paraphrases that share vocabulary.
+    """
+
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    def _features(self, text: str):
+        words = re.findall(r"\w+", text.lower())
+        for word in words:
+            yield word, 1.0
+            padded = f"#{word}#"
+            for i in range(len(padded) - 2):
+                yield "c:" + padded[i:i + 3], 0.5
+        for first, second in zip(words, words[1:]):
+            yield f"b:{first} {second}", 0.5
+
+    async def embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature, weight in self._features(text):
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            vector[value % self.dim] += weight if value >> 63 else -weight
+        return normalize(vector)
+
+class BedrockEmbedder(object):
+    """Embeddings from a Bedrock text embedding model (Titan by default)."""
+
+    def __init__(self, model_id: str, region: str):
+        self.model_id = model_id
+        self.region = region
+
+    async def embed(self, text: str) -> np.ndarray:
+        from bedrock.client import bedrock_clients
+
+        def invoke():
+            client = bedrock_clients.get("bedrock-runtime", self.region)
+            response = client.invoke_model(modelId=self.model_id, body=json.dumps({"inputText": text}))
+            return json.loads(response["body"].read())["embedding"]
+        return normalize(np.asarray(await asyncio.to_thread(invoke), dtype=np.float32))
+
+def normalize(vector: np.ndarray) -> np.ndarray:
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+def make_embedder(name: str):
+    if name == "hashing":
+        return HashingEmbedder(int(stream_conf.stream_semantic_hashing_dim))
+    if name == "bedrock":
+        return BedrockEmbedder(stream_conf.stream_semantic_embed_model_id, aws_conf.aws_region)
+    raise ValueError(f"[SemanticCache] Unsupported embedder: {name}")
+
+def last_user_text(messages: list) -> Optional[str]:
+    """
+    Text of the last user turn, or None when it cannot be matched semantically.
+    Images and documents are not embedded, so a turn carrying any is never a hit.
+    """
+    if not messages or messages[-1].get("role") != "user":
+        return None
+    content = messages[-1].get("content", [])
+    if any(not isinstance(part, dict) or part.get("type") != "text" for part in content):
+        return None
+    parts = [part.get("text") or "" for part in content]
+    text = "\n".join(part for part in parts if part).strip()
+    return text or None
+
+class SemanticIndex(object):
+    """
+    Prompt vectors of one agent (or bare LLM) in a NumPy matrix, searched by
+    cosine similarity. Each row carries the scope it was answered in (model,
+    sampling, system prompt and earlier turns) and only matches that scope.
+
+    Rows are written in place: the arrays double in capacity up to
+    `max_entries`, then act as a ring buffer that overwrites the oldest row.
+    Expired rows stay until overwritten but never match.
+    """
+
+    INITIAL_CAPACITY = 16
+
+    def __init__(self, dim: int, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        capacity = min(self.INITIAL_CAPACITY, self.max_entries)
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.created = np.full(capacity, -np.inf)  # never live until written
+        self.scopes = np.empty(capacity, dtype=object)
+        self.answers = [None] * capacity
+        self.size = 0  # rows written so far, at most the capacity
+        self.oldest = 0  # next row to overwrite once full
+
+    @property
+    def dim(self) -> int:
+        return self.vectors.shape[1]
+
+    def __len__(self):
+        """Live (unexpired) rows."""
+        return int(np.count_nonzero(self._live()))
+
+    def _live(self) -> np.ndarray:
+        return time.monotonic() - self.created[:self.size] < self.ttl
+
+    def search(self, vector: np.ndarray, scope: str, k: int = 1) -> List[Tuple[float, int]]:
+        """Top-k (similarity, row) among live rows of `scope`, best first."""
+        if not self.size:
+            return []
+        similarities = self.vectors[:self.size] @ vector
+        live = (self.scopes[:self.size] == scope) & self._live()
+        similarities = np.where(live, similarities, -np.inf)
+        k = min(k, self.size)
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(-similarities[top])]
+        return [(float(similarities[row]), int(row)) for row in top if np.isfinite(similarities[row])]
+
+    def add(self, vector: np.ndarray, scope: str, events: List[dict]):
+        now = time.monotonic()
+        if self.size == len(self.created) and self.size < self.max_entries:
+            self._grow(min(2 * self.size, self.max_entries))
+        if self.size < len(self.created):
+            row = self.size
+            self.size += 1
+        else:
+            # Full: rows are written in insertion order, so `oldest` goes first
+            row = self.oldest
+            self.oldest = (row + 1) % self.size
+            if now - self.created[row] < self.ttl:
+                metrics.inc("semantic_cache_evictions")
+        self.vectors[row] = vector
+        self.created[row] = now
+        self.scopes[row] = scope
+        self.answers[row] = events
+
+    def _grow(self, capacity: int):
+        vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+        vectors[:self.size] = self.vectors[:self.size]
+        created = np.full(capacity, -np.inf)
+        created[:self.size] = self.created[:self.size]
+        scopes = np.empty(capacity, dtype=object)
+        scopes[:self.size] = self.scopes[:self.size]
+        self.vectors, self.created, self.scopes = vectors, created, scopes
+        self.answers.extend([None] * (capacity - len(self.answers)))
+
+class SemanticCache(object):
+    """
+    Reuses an earlier answer when the last user turn is close enough to a
+    previous one for the same agent, model and conversation so far. Every
+    lookup records the best similarity found, so `threshold` can be tuned
+    from the `semantic_cache_similarity` distribution.
+    """
+
+    def __init__(self, embedder_name: str, threshold: float, ttl: float, max_entries: int):
+        self.embedder_name = embedder_name
+        self._embedder = None
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._indexes = {}  # agent name or "llm:<model id>" -> SemanticIndex
+        self._lookups = {}
+        self._hits = {}
+
+    @property
+    def embedder(self):
+        """Built on first use, so a disabled cache never creates a Bedrock client."""
+        if self._embedder is None:
+            self._embedder = make_embedder(self.embedder_name)
+        return self._embedder
+
+    async def lookup(self, parts: dict):
+        """
+        Return (cached events or None, probe). Pass the probe to `store` once the
+        live answer completes; it is None when the request cannot be cached.
+        """
+        question = last_user_text(parts.get("messages"))
+        if question is None:
+            return None, None
+        name = parts.get("agent") or f"llm:{parts.get('model_id')}"
+        scope = cache_key(**dict(parts, messages=parts["messages"][:-1]))
+        try:
+            vector = await self.embedder.embed(question)
+        except Exception as e:
+            logger.error(f"[SemanticCache] embedding failed: {e} \n TRACEBACK: {traceback.format_exc()}")
+            return None, None
+
+        index = self._indexes.get(name)
+        matches = index.search(vector, scope) if index is not None else []
+        hit = matches and matches[0][0] >= self.threshold
+        if matches:
+            metrics.observe("semantic_cache_similarity", matches[0][0], index=name)
+
+        self._lookups[name] = self._lookups.get(name, 0) + 1
+        self._hits[name] = self._hits.get(name, 0) + (1 if hit else 0)
+        metrics.inc("semantic_cache_hits" if hit else "semantic_cache_misses", index=name)
+        metrics.set_gauge("semantic_cache_hit_rate", self._hits[name] / self._lookups[name], index=name)
+
+        probe = (name, scope, vector)
+        if hit:
+            return index.answers[matches[0][1]], probe
+        return None, probe
+
+    def store(self, probe, events: List[dict]):
+        name, scope, vector = probe
+        index = self._indexes.get(name)
+        if index is None or index.dim != len(vector):
+            index = SemanticIndex(len(vector), self.ttl, self.max_entries)
+            self._indexes[name] = index
+        index.add(vector, scope, events)
+        metrics.set_gauge("semantic_cache_entries", len(index), index=name)
+
+semantic_cache = SemanticCache(
+    embedder_name=stream_conf.stream_semantic_embedder,
+    threshold=float(stream_conf.stream_semantic_threshold),
+    ttl=float(stream_conf.stream_semantic_ttl_seconds),
+    max_entries=int(stream_conf.stream_semantic_max_entries),
+)
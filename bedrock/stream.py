@@ -1,41 +1,272 @@
 import asyncio
 import traceback
+from contextlib import aclosing
 from helpers.loog import logger
+from helpers.config import StreamConfig
 from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
 from bedrock.factory import AgentFactory, LLMFactory, PromptFactory
-from typing import AsyncGenerator
+from bedrock.frames import coalesce, render
+from bedrock.resume import resumable_streams
+from bedrock.telemetry import StreamTelemetry
+from bedrock.admission import llm_admission
+from bedrock.governor import model_governors, is_retryable, backoff_delay, QuotaExceeded
+from bedrock.cache import response_cache, cache_key
+from bedrock.semantic import semantic_cache
+from helpers.metrics import metrics
+from typing import AsyncGenerator, AsyncIterator
+
+USAGE_FIELDS = ("input_tokens", "output_tokens", "total_tokens")
+
+def add_usage(usage: dict, chunk):
+    """Accumulate Converse usage metadata from a message chunk into `usage`."""
+    chunk_usage = getattr(chunk, "usage_metadata", None) or {}
+    for field in USAGE_FIELDS:
+        usage[field] = usage.get(field, 0) + (chunk_usage.get(field) or 0)
+
+def stop_reason(chunk):
+    return (getattr(chunk, "response_metadata", None) or {}).get("stopReason")
 
 class Streaming():
     def __init__(self):
         self.agent_factory = AgentFactory()
         self.llm_factory = LLMFactory()
-        
-    async def agent_astreaming(self, chat_id: str, message: dict, agent_name: str, model_name: str, stream_mode: str) -> AsyncGenerator[str, None]:
+        self.stream_conf = StreamConfig()
+
+    async def admit(self, model_name: str, user: str, background: bool = False):
+        """
+        Wait for a stream slot on the LLM, fairly across users. Returns the slot,
+        or None for unknown models (the stream reports those itself).
+        Raises `AdmissionRejected` when the model's wait queue is full.
+        `background` requests wait behind all interactive ones and are never rejected.
+        """
+        llm = await self.agent_factory.get_llm((model_name or "").lower())
+        if llm is None:
+            return None
+        return await llm_admission.acquire(llm, user, background=background)
+
+    def frames(self, chat_id: str, events: AsyncIterator[dict], sse: bool, http_req=None, slot=None) -> AsyncGenerator[str, None]:
+        """
+        Coalesce stream events into frames and render them as SSE or plain text.
+
+        The answer is generated in the background into a per-session buffer. SSE
+        answers can be resumed with `resume_frames`; with `http_req`, generation is
+        cancelled once the client has disconnected (after the resume grace period
+        for SSE).
+        """
+        stream = self.start(chat_id, events, resumable=sse, slot=slot)
+        return self._follow(stream, 0, sse, http_req)
+
+    def start(self, chat_id: str, events: AsyncIterator[dict], resumable: bool = True, slot=None):
+        """
+        Start generating a coalesced answer for a session in the background and
+        return its stream. An admission `slot` is released once generation ends.
+        """
+        coalesced = coalesce(
+            events,
+            window=float(self.stream_conf.stream_coalesce_ms) / 1000,
+            max_chars=int(self.stream_conf.stream_coalesce_chars),
+            queue_size=int(self.stream_conf.stream_event_queue_size),
+        )
+        stream = resumable_streams.start(chat_id, coalesced, resumable=resumable)
+        if slot is not None:
+            stream.task.add_done_callback(lambda _: slot.release())
+        return stream
+
+    def resume_frames(self, chat_id: str, last_event_id: str, sse: bool = True, http_req=None):
+        """Frames after `last_event_id` of the session's buffered answer, or None if it cannot be resumed."""
+        found = resumable_streams.resume(chat_id, last_event_id)
+        if found is None:
+            return None
+        stream, after = found
+        return self._follow(stream, after, sse, http_req)
+
+    def follow(self, stream, after: int = 0, http_req=None) -> AsyncGenerator[dict, None]:
+        """Events of a started stream after sequence number `after`, with heartbeats while idle."""
+        return stream.follow(
+            after,
+            heartbeat=float(self.stream_conf.stream_heartbeat_seconds),
+            is_disconnected=http_req.is_disconnected if http_req is not None else None,
+            poll=float(self.stream_conf.stream_disconnect_poll_seconds),
+        )
+
+    def _follow(self, stream, after: int, sse: bool, http_req=None) -> AsyncGenerator[str, None]:
+        return render(self.follow(stream, after, http_req), sse)
+
+    def cache_enabled(self) -> bool:
+        return self.stream_conf.stream_cache_enabled.lower() == "true"
+
+    def semantic_cache_enabled(self) -> bool:
+        return self.stream_conf.stream_semantic_cache_enabled.lower() == "true"
+
+    def cacheable(self, parts: dict, max_temperature: str) -> bool:
+        """Only answers sampled at or below `max_temperature` are worth replaying."""
+        return float(parts["temperature"]) <= float(max_temperature)
+
+    async def _cached(self, kind: str, make_parts, make_events) -> AsyncGenerator[dict, None]:
+        """
+        Replay a cached answer, exact match first, then a semantically similar
+        question, or stream `make_events()` and cache the answer once it completes.
+        Either way the caller sees the same events.
+        """
+        exact, semantic = self.cache_enabled(), self.semantic_cache_enabled()
+        parts = await make_parts() if exact or semantic else None
+        # Each cache has its own temperature limit
+        exact = exact and parts is not None and self.cacheable(parts, self.stream_conf.stream_cache_max_temperature)
+        semantic = semantic and parts is not None and self.cacheable(parts, self.stream_conf.stream_semantic_max_temperature)
+        key = cache_key(**parts) if exact else None
+        cached = response_cache.get(key, kind) if key else None
+        probe = None
+        if cached is None and semantic:
+            cached, probe = await semantic_cache.lookup(parts)
+        if cached is not None:
+            for event in cached:
+                yield dict(event)
+            return
+
+        recorded = []
+        async with aclosing(make_events()) as events:
+            async for event in events:
+                recorded.append(event)
+                yield event
+        if recorded and recorded[-1].get("type") == "done":
+            if key:
+                response_cache.put(key, recorded)
+            if probe:
+                semantic_cache.store(probe, recorded)
+
+    async def _agent_cache_parts(self, agent_name: str, model_name: str, message: dict):
+        """Everything that determines an agent answer, or None when the agent or model is unknown."""
+        agent = await self.agent_factory.get_agent((agent_name or "").lower())
+        llm = await self.agent_factory.get_llm((model_name or "").lower())
+        if not agent or not llm:
+            return None
+        return dict(
+            agent=agent.name,
+            tools=agent.tools,
+            model_id=llm.model_id,
+            temperature=llm.model_temperature,
+            max_tokens=llm.model_max_tokens,
+            system_prompt=agent.system_prompt,
+            messages=message.get("messages"),
+        )
+
+    async def _llm_cache_parts(self, model_name: str, message: dict):
+        """Everything that determines a direct LLM answer, or None when the model is unknown."""
+        llm = await self.agent_factory.get_llm((model_name or "").lower())
+        if not llm:
+            return None
+        return dict(
+            model_id=llm.model_id,
+            temperature=llm.model_temperature,
+            max_tokens=llm.model_max_tokens,
+            system_prompt=PromptFactory.llm_prompt_cache_parts(),
+            messages=message.get("messages"),
+        )
+
+    def agent_astreaming(self, chat_id: str, message: dict, agent_name: str, model_name: str, stream_mode: str) -> AsyncGenerator[dict, None]:
+        """Events of an agent answer, replayed from the response caches when enabled and present."""
+        return self._cached(
+            "agent",
+            lambda: self._agent_cache_parts(agent_name, model_name, message),
+            lambda: self._agent_astreaming(chat_id, message, agent_name, model_name, stream_mode),
+        )
+
+    def llm_astreaming(self, chat_id: str, message: dict, model_name: str, prompt_variables: dict = None) -> AsyncGenerator[dict, None]:
+        """Events of a direct LLM answer, replayed from the response caches when enabled and present."""
+        return self._cached(
+            "llm",
+            lambda: self._llm_cache_parts(model_name, message),
+            lambda: self._llm_astreaming(chat_id, message, model_name, prompt_variables),
+        )
+
+    async def _agent_astreaming(self, chat_id: str, message: dict, agent_name: str, model_name: str, stream_mode: str) -> AsyncGenerator[dict, None]:
+        telemetry = StreamTelemetry("agent", agent_name, model_name)
+        usage = {}
+        finish_reason = None
+        status = "error"
+        attempts = max(1, int(self.stream_conf.stream_retry_attempts))
         try:
-            agent = await self.agent_factory.agent(agent_name=agent_name, model_name=model_name)
-            if agent:
-                # The ReAct agent returns a dict with 'output'
-                async for token, metadata in agent.astream(input=message, stream_mode=stream_mode):
-                    if metadata.get("langgraph_node") == "model":
-                        content_blocks = token.content_blocks or []
-                        for block in content_blocks:
-                            if block.get("type") == "text":
-                                text = block.get("text", "")
-                                if text.strip():
-                                    yield text
-                                    await asyncio.sleep(0)
-                yield "\n"
+            last_error = None
+            # Throttled before the first token: retry with backoff, then fall over to the agent's next LLM
+            for index, llm in enumerate(await self.agent_factory.model_candidates(agent_name, model_name)):
+                agent = await self.agent_factory.agent(agent_name=agent_name, model_name=llm.name)
+                if not agent:
+                    continue
+                if index:
+                    metrics.inc("model_fallbacks", agent=agent_name, model=llm.name)
+                    telemetry.labels["model"] = llm.name
+
+                # Set once text reached the client or a tool was called; a retry would repeat either
+                committed = False
+                for attempt in range(attempts):
+                    usage = {}
+                    telemetry.restart()
+                    try:
+                        reservation = await model_governors.reserve(llm, message)
+                        try:
+                            # Closing the agent stream on cancellation also cancels its running tool calls
+                            async with aclosing(agent.astream(input=message, stream_mode=stream_mode)) as stream:
+                                async for token, metadata in stream:
+                                    node = metadata.get("langgraph_node")
+                                    if node == "tools":
+                                        committed = True
+                                        telemetry.on_tool_message()
+                                    if node == "model":
+                                        telemetry.on_model_chunk(metadata.get("langgraph_step"))
+                                        add_usage(usage, token)
+                                        finish_reason = stop_reason(token) or finish_reason
+                                        if getattr(token, "tool_call_chunks", None):
+                                            committed = True
+                                        content_blocks = token.content_blocks or []
+                                        for block in content_blocks:
+                                            if block.get("type") == "text":
+                                                text = block.get("text", "")
+                                                if text.strip():
+                                                    committed = True
+                                                    yield {"type": "text", "text": text}
+                        finally:
+                            # Also on failure, so a throttled attempt gives back its unused tokens
+                            reservation.settle(len(telemetry.steps) or 1, usage.get("total_tokens", 0))
+                        status = "ok"
+                        yield {"type": "done", "finish_reason": finish_reason, "usage": usage}
+                        return
+                    except Exception as e:
+                        if committed or not is_retryable(e):
+                            raise
+                        last_error = e
+                        metrics.inc("model_throttled", model=llm.name)
+                        if isinstance(e, QuotaExceeded) or attempt + 1 == attempts:
+                            break
+                        await asyncio.sleep(backoff_delay(attempt, float(self.stream_conf.stream_retry_base_delay), float(self.stream_conf.stream_retry_max_delay)))
+
+            if last_error is not None:
+                status = "throttled"
+                yield {"type": "error", "code": "throttled", "message": str(last_error)}
+                logger.error(f"[Stream] {agent_name} throttled on every model: {last_error}")
             else:
-                yield f"Agent {agent_name} with model {model_name} not found."
+                status = "not_found"
+                yield {"type": "error", "code": "not_found", "message": f"Agent {agent_name} with model {model_name} not found."}
+        except (asyncio.CancelledError, GeneratorExit):
+            status = "cancelled"
+            raise
         except Exception as e:
-            yield f"\n[Error] {str(e)}"
-            logger.error(f"An error occurred: {e} \n TRACEBACK: ", traceback.format_exc())
-    
-    async def llm_astreaming(self, chat_id: str, message: dict, model_name: str) -> AsyncGenerator[str, None]:
+            # Throttled mid-answer, too late to retry
+            yield {"type": "error", "code": "throttled" if is_retryable(e) else "internal", "message": str(e)}
+            logger.error(f"An error occurred: {e} \n TRACEBACK: {traceback.format_exc()}")
+        finally:
+            telemetry.finish(usage, finish_reason, status)
+
+    async def _llm_astreaming(self, chat_id: str, message: dict, model_name: str, prompt_variables: dict = None) -> AsyncGenerator[dict, None]:
+        telemetry = StreamTelemetry("llm", None, model_name)
+        usage = {}
+        finish_reason = None
+        status = "error"
         try:
-            llm = self.llm_factory.llm(model_name=model_name)
-            if llm:
-                    LLM_PROMPT = PromptFactory.load_llm_prompt()
+            # The same row keys the response cache and the quota, so it also builds the model
+            db_llm = await self.agent_factory.get_llm((model_name or "").lower())
+            if db_llm:
+                    llm = self.llm_factory.llm(db_llm)
+                    LLM_PROMPT = PromptFactory.load_llm_prompt(chat_session_id=chat_id, **(prompt_variables or {}))
                     lc_messages = [SystemMessage(content=LLM_PROMPT)]
 
                     for msg in message.get("messages", []):
@@ -50,15 +281,52 @@ class Streaming():
                         elif role == "system":
                             lc_messages.append(SystemMessage(content=text))
 
-                    async for chunk in llm.astream(input=lc_messages):
-                        yield chunk.text
-                        await asyncio.sleep(0)
-                                        
-                    yield "\n"
+                    attempts = max(1, int(self.stream_conf.stream_retry_attempts))
+                    sent = False
+                    last_error = None
+                    for attempt in range(attempts):
+                        usage = {}
+                        try:
+                            reservation = await model_governors.reserve(db_llm, message)
+                            try:
+                                async with aclosing(llm.astream(input=lc_messages)) as stream:
+                                    async for chunk in stream:
+                                        telemetry.on_model_chunk()
+                                        add_usage(usage, chunk)
+                                        finish_reason = stop_reason(chunk) or finish_reason
+                                        if chunk.text:
+                                            sent = True
+                                            yield {"type": "text", "text": chunk.text}
+                            finally:
+                                reservation.settle(1, usage.get("total_tokens", 0))
+                            status = "ok"
+                            yield {"type": "done", "finish_reason": finish_reason, "usage": usage}
+                            return
+                        except Exception as e:
+                            # Only retry throttling that happened before anything reached the client
+                            if sent or not is_retryable(e):
+                                raise
+                            last_error = e
+                            metrics.inc("model_throttled", model=model_name)
+                            if isinstance(e, QuotaExceeded) or attempt + 1 == attempts:
+                                break
+                            await asyncio.sleep(backoff_delay(attempt, float(self.stream_conf.stream_retry_base_delay), float(self.stream_conf.stream_retry_max_delay)))
+
+                    status = "throttled"
+                    yield {"type": "error", "code": "throttled", "message": str(last_error)}
+                    logger.error(f"[Stream] {model_name} throttled: {last_error}")
             else:
-                yield f"Model {model_name} not found."
+                status = "not_found"
+                yield {"type": "error", "code": "not_found", "message": f"Model {model_name} not found."}
+        except (asyncio.CancelledError, GeneratorExit):
+            status = "cancelled"
+            raise
         except Exception as e:
-            yield f"\n[Error] {str(e)}"
-            logger.error(f"An error occurred: {e} \n TRACEBACK: ", traceback.format_exc())
-    
-    
\ No newline at end of file
+            # Throttled mid-answer, too late to retry
+            yield {"type": "error", "code": "throttled" if is_retryable(e) else "internal", "message": str(e)}
+            logger.error(f"An error occurred: {e} \n TRACEBACK: {traceback.format_exc()}")
+        finally:
+            telemetry.finish(usage, finish_reason, status)
+
+# Shared by every router, so agents are compiled and cached once per process
+streaming = Streaming()
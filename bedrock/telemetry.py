@@ -0,0 +1,104 @@
+import time
+from helpers.loog import logger
+from helpers.metrics import metrics
+
+class StreamTelemetry(object):
+    """
+    Timing and token accounting for one model stream.
+
+    Tracks time to first token, the mean gap between model chunks, tokens in
+    and out (from Converse usage metadata), output tokens per second, and for
+    agents the number of model steps and the time spent in the tools node
+    between them. `finish()` publishes everything to `metrics`, labelled by
+    agent and model, and writes one structured log line.
+    """
+
+    def __init__(self, kind: str, agent_name: str, model_name: str):
+        self.kind = kind
+        self.labels = {"agent": agent_name or "-", "model": model_name or "-"}
+        self.started = time.monotonic()
+        self.first_token_at = None
+        self.last_token_at = None
+        self.chunks = 0
+        self.steps = set()
+        self.tool_seconds = 0.0
+        self._tool_started = None
+        self._tool_ended = None
+
+    def on_model_chunk(self, step=None):
+        now = time.monotonic()
+        if self._tool_started is not None:
+            self.tool_seconds += self._tool_ended - self._tool_started
+            self._tool_started = self._tool_ended = None
+        if self.first_token_at is None:
+            self.first_token_at = now
+        self.last_token_at = now
+        self.chunks += 1
+        if step is not None:
+            self.steps.add(step)
+
+    def restart(self):
+        """Forget the steps and tool time of an attempt that is being retried."""
+        self.steps.clear()
+        self.tool_seconds = 0.0
+        self._tool_started = self._tool_ended = None
+
+    def on_tool_message(self):
+        # Tools start once the model's tool-use turn has streamed its last chunk
+        now = time.monotonic()
+        if self._tool_started is None:
+            self._tool_started = self.last_token_at or self.started
+        self._tool_ended = now
+
+    def finish(self, usage: dict = None, finish_reason: str = None, status: str = "ok") -> dict:
+        if self._tool_started is not None:
+            self.tool_seconds += self._tool_ended - self._tool_started
+            self._tool_started = self._tool_ended = None
+
+        usage = usage or {}
+        total = time.monotonic() - self.started
+        stats = {
+            "event": "model_stream",
+            "kind": self.kind,
+            **self.labels,
+            "status": status,
+            "finish_reason": finish_reason,
+            "total_seconds": round(total, 4),
+            "ttft_seconds": None,
+            "inter_token_seconds": None,
+            "tokens_in": usage.get("input_tokens"),
+            "tokens_out": usage.get("output_tokens"),
+            "tokens_per_second": None,
+            "agent_steps": len(self.steps) if self.kind == "agent" else None,
+            "tool_seconds": round(self.tool_seconds, 4) if self.kind == "agent" else None,
+        }
+
+        metrics.inc("model_streams", status=status, **self.labels)
+        metrics.observe("model_stream_seconds", total, **self.labels)
+        if self.first_token_at is not None:
+            ttft = self.first_token_at - self.started
+            stats["ttft_seconds"] = round(ttft, 4)
+            metrics.observe("model_ttft_seconds", ttft, **self.labels)
+
+            # Agents idle while their tools run, so that time is not generation time
+            generating = max(0.0, self.last_token_at - self.first_token_at - self.tool_seconds)
+            if self.chunks > 1:
+                # One sample per stream keeps the per-token path free of metric locks
+                inter_token = generating / (self.chunks - 1)
+                stats["inter_token_seconds"] = round(inter_token, 5)
+                metrics.observe("model_inter_token_seconds", inter_token, **self.labels)
+            if usage.get("output_tokens") and generating > 0:
+                tps = usage["output_tokens"] / generating
+                stats["tokens_per_second"] = round(tps, 2)
+                metrics.observe("model_tokens_per_second", tps, **self.labels)
+
+        if usage.get("input_tokens"):
+            metrics.inc("model_tokens_in", usage["input_tokens"], **self.labels)
+        if usage.get("output_tokens"):
+            metrics.inc("model_tokens_out", usage["output_tokens"], **self.labels)
+        if self.kind == "agent":
+            metrics.observe("agent_steps", len(self.steps), **self.labels)
+            metrics.observe("agent_tool_seconds", self.tool_seconds, **self.labels)
+
+        logger.info(stats)
+        return stats
@@ -1,12 +1,39 @@
 # crud.py
+import json
+import uuid
 from typing import List, Optional
-from sqlalchemy import select
+from sqlalchemy import select, text
 from sqlalchemy.orm import joinedload
 from sqlalchemy.ext.asyncio import AsyncSession
 from databases import models, schemas
-from passlib.context import CryptContext
+from helpers.authentication import ahash_user_password
+from helpers.config import DatabaseConfig
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+db_conf = DatabaseConfig()
+
+# -------------------  CONFIG VERSION  -------------------
+
+# Bumped whenever an agent, LLM or tool row changes so caches built from
+# those rows (compiled agents, tool instances, ...) know to rebuild.
+_config_version = 0
+
+# Identifies this process in config change notifications so it can skip its own
+config_instance_id = uuid.uuid4().hex
+
+def get_config_version() -> int:
+    return _config_version
+
+def bump_config_version():
+    global _config_version
+    _config_version += 1
+
+async def notify_config_change(db: AsyncSession, table: str):
+    """Queue a NOTIFY, delivered on commit, so every worker reloads its config registry."""
+    payload = json.dumps({"table": table, "instance": config_instance_id})
+    await db.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": db_conf.db_config_channel, "payload": payload},
+    )
 
 # -------------------  ROLES  -------------------
 
@@ -81,7 +108,7 @@ async def create_user(db: AsyncSession, data: schemas.UserCreate):
         return 400, "Username or email already taken"
 
     user_data = data.model_dump()
-    user_data["hashed_password"] = pwd_context.hash(user_data["hashed_password"])
+    user_data["hashed_password"] = await ahash_user_password(user_data["hashed_password"])
     user = models.UserModel(**user_data)
     db.add(user)
     await db.commit()
@@ -192,8 +219,10 @@ async def create_tool(db: AsyncSession, data: schemas.ToolCreate):
     tool_data = data.model_dump()
     tool = models.ToolModel(**tool_data)
     db.add(tool)
+    await notify_config_change(db, "tools")
     await db.commit()
     await db.refresh(tool)
+    bump_config_version()
     return tool
 
 
@@ -237,8 +266,10 @@ async def update_tool(db: AsyncSession, tool_id: int, data: schemas.ToolUpdate):
         setattr(tool, key, value)
 
     db.add(tool)
+    await notify_config_change(db, "tools")
     await db.commit()
     await db.refresh(tool)
+    bump_config_version()
     return tool
 
 
@@ -252,8 +283,10 @@ async def delete_tool(db: AsyncSession, tool_id: int):
 
     tool.trashed = True
     db.add(tool)
+    await notify_config_change(db, "tools")
     await db.commit()
     await db.refresh(tool)
+    bump_config_version()
     return True
 
 
@@ -263,8 +296,10 @@ async def create_llm(db: AsyncSession, data: schemas.LLMCreate):
     llm_data = data.model_dump()
     llm = models.LLMModel(**llm_data)
     db.add(llm)
+    await notify_config_change(db, "llms")
     await db.commit()
     await db.refresh(llm)
+    bump_config_version()
     return llm
 
 
@@ -301,8 +336,10 @@ async def update_llm(db: AsyncSession, llm_id: int, data: schemas.LLMUpdate):
         setattr(llm, key, value)
 
     db.add(llm)
+    await notify_config_change(db, "llms")
     await db.commit()
     await db.refresh(llm)
+    bump_config_version()
     return llm
 
 
@@ -316,8 +353,10 @@ async def delete_llm(db: AsyncSession, llm_id: int):
 
     llm.trashed = True
     db.add(llm)
+    await notify_config_change(db, "llms")
     await db.commit()
     await db.refresh(llm)
+    bump_config_version()
     return True
 
 # -------------------  AGENTS  -------------------
@@ -326,8 +365,10 @@ async def create_agent(db: AsyncSession, data: schemas.AgentCreate):
     agent_data = data.model_dump()
     agent = models.AgentModel(**agent_data)
     db.add(agent)
+    await notify_config_change(db, "agents")
     await db.commit()
     await db.refresh(agent)
+    bump_config_version()
     return agent
 
 
@@ -361,8 +402,10 @@ async def update_agent(db: AsyncSession, agent_id: int, data: schemas.AgentUpdat
         setattr(agent, key, value)
 
     db.add(agent)
+    await notify_config_change(db, "agents")
     await db.commit()
     await db.refresh(agent)
+    bump_config_version()
     return agent
 
 
@@ -376,8 +419,10 @@ async def delete_agent(db: AsyncSession, agent_id: int):
 
     agent.trashed = True
     db.add(agent)
+    await notify_config_change(db, "agents")
     await db.commit()
     await db.refresh(agent)
+    bump_config_version()
     return True
 
 async def get_default_agent(db: AsyncSession):
@@ -1,4 +1,4 @@
-from sqlalchemy import text
+from sqlalchemy import text, inspect
 from helpers.loog import logger
 from urllib.parse import urlparse
 from sqlalchemy.orm import sessionmaker
@@ -52,4 +52,25 @@ async def create_database_if_not_exists():
         else:
             logger.info(f"✅ Database '{db_name}' already exists.")
 
-    await default_engine.dispose()
\ No newline at end of file
+    await default_engine.dispose()
+
+def add_missing_columns(sync_conn):
+    """
+    `create_all` never alters existing tables. Add any model column that is missing
+    from the database as a plain nullable column, so new optional settings roll out
+    without a manual migration. Run through `conn.run_sync(...)`.
+    """
+    from databases.base import Base
+
+    inspector = inspect(sync_conn)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing = {c["name"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            column_type = column.type.compile(dialect=sync_conn.dialect)
+            sync_conn.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN IF NOT EXISTS "{column.name}" {column_type}'))
+            logger.info(f"🆕 Added column '{table.name}.{column.name}'.")
@@ -25,6 +25,13 @@ class LLMModel(Base):
     # Guardrails
     guardrail_id = Column(String(255), nullable=True)
     guardrail_version = Column(String(64), nullable=True)
+
+    # Concurrent streams admitted for this model, empty uses STREAM_MODEL_CONCURRENCY
+    max_concurrency = Column(String(8), nullable=True)
+
+    # Client-side quotas for this model id and region, empty uses STREAM_DEFAULT_RPM / STREAM_DEFAULT_TPM
+    quota_rpm = Column(String(16), nullable=True)
+    quota_tpm = Column(String(16), nullable=True)
     
     # System prompt
     system_prompt = Column(Text, nullable=True)
@@ -89,6 +96,16 @@ class ToolModel(Base):
     client_secret = Column(String(255), nullable=True)
     user_agent = Column(String(255), nullable=True)
 
+    # Execution limits, empty falls back to TOOL_DEFAULT_TIMEOUT / TOOL_DEFAULT_CONCURRENCY
+    timeout_seconds = Column(String(8), nullable=True)
+    max_concurrency = Column(String(8), nullable=True)
+
+    # Result cache TTL in seconds, empty uses the per-tool default, "0" disables caching
+    cache_ttl_seconds = Column(String(8), nullable=True)
+
+    # Output budget handed back to the model, empty uses TOOL_DEFAULT_OUTPUT_TOKENS, "0" disables
+    max_output_tokens = Column(String(8), nullable=True)
+
     # Metadata
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -0,0 +1,132 @@
+import json
+import asyncio
+import asyncpg
+import traceback
+from helpers.loog import logger
+from helpers.config import DatabaseConfig
+from databases.database import SessionLocal, DATABASE_URL
+from databases.crud import (
+    get_agents, get_llms, get_tools, get_config_version, bump_config_version, config_instance_id
+)
+
+db_conf = DatabaseConfig()
+
+class ConfigRegistry(object):
+    """
+    In-process snapshot of the `agents`, `llms` and `tools` tables.
+
+    Lookups are served from memory. The snapshot is reloaded lazily whenever the
+    config version in `databases.crud` moves, which happens on local writes and
+    when another worker or node announces a change via Postgres LISTEN/NOTIFY.
+    """
+
+    def __init__(self, reconnect_delay: float = 5.0):
+        self.reconnect_delay = reconnect_delay
+        self._agents = {}
+        self._llms = {}
+        self._tools = {}
+        self._loaded_version = None
+        self._reload_lock = asyncio.Lock()
+        self._listener_task = None
+
+    async def reload(self):
+        """Load all three tables in a single session and swap the snapshot in."""
+        async with self._reload_lock:
+            version = get_config_version()
+            if self._loaded_version == version:
+                return
+
+            try:
+                async with SessionLocal() as session:
+                    agents = await get_agents(session)
+                    llms = await get_llms(session)
+                    tools = await get_tools(session)
+                    session.expunge_all()
+            except Exception as e:
+                logger.error(f"[ConfigRegistry] Reload failed, keeping previous snapshot: {e}")
+                return
+
+            self._agents = {a.name: a for a in agents}
+            self._llms = {l.name: l for l in llms}
+            self._tools = {t.name: t for t in tools}
+            self._loaded_version = version
+            logger.info(f"[ConfigRegistry] Loaded {len(agents)} agents, {len(llms)} llms, {len(tools)} tools (version {version})")
+
+    async def _ensure_fresh(self):
+        if self._loaded_version != get_config_version():
+            await self.reload()
+
+    async def get_agent(self, name: str):
+        await self._ensure_fresh()
+        return self._agents.get(name)
+
+    async def get_llm(self, name: str):
+        await self._ensure_fresh()
+        return self._llms.get(name)
+
+    async def get_llm_by_id(self, llm_id):
+        await self._ensure_fresh()
+        for llm in self._llms.values():
+            if str(llm.id) == str(llm_id):
+                return llm
+        return None
+
+    async def get_tool(self, name: str):
+        await self._ensure_fresh()
+        return self._tools.get(name)
+
+    async def get_enabled_tools(self):
+        await self._ensure_fresh()
+        return [t for t in self._tools.values() if t.status == "enable"]
+
+    def _on_notify(self, connection, pid, channel, payload):
+        try:
+            source = json.loads(payload).get("instance")
+        except (TypeError, ValueError):
+            source = None
+
+        # Local writes already bumped the version themselves
+        if source != config_instance_id:
+            bump_config_version()
+
+    async def _listen(self):
+        """Keep a dedicated LISTEN connection open, reconnecting on failure."""
+        dsn = DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://", 1)
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(dsn)
+                await connection.add_listener(db_conf.db_config_channel, self._on_notify)
+                # Notifications may have been missed while disconnected
+                bump_config_version()
+                logger.info(f"[ConfigRegistry] Listening on '{db_conf.db_config_channel}'")
+
+                closed = asyncio.Event()
+                connection.add_termination_listener(lambda conn: closed.set())
+                await closed.wait()
+                logger.error("[ConfigRegistry] LISTEN connection closed, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"[ConfigRegistry] LISTEN connection failed: {e} \n TRACEBACK: {traceback.format_exc()}")
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def start(self):
+        await self.reload()
+        if self._listener_task is None:
+            self._listener_task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
+
+config_registry = ConfigRegistry()
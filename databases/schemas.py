@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, field_validator
 from typing import Optional, List, Any
 from datetime import datetime
 
@@ -109,9 +109,33 @@ class ToolBase(BaseModel):
     client_id: Optional[str] = None
     client_secret: Optional[str] = None
     user_agent: Optional[str] = None
+    timeout_seconds: Optional[str] = None
+    max_concurrency: Optional[str] = None
+    cache_ttl_seconds: Optional[str] = None
+    max_output_tokens: Optional[str] = None
+
+def positive_number(value: Optional[str], cast) -> Optional[str]:
+    """Numeric settings are stored as strings; reject ones the tool executor cannot use."""
+    if value is None or value == "":
+        return value
+    try:
+        parsed = cast(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"must be a number, got {value!r}")
+    if parsed <= 0:
+        raise ValueError("must be greater than 0")
+    return value
 
 class ToolCreate(ToolBase):
-    pass
+    @field_validator("timeout_seconds")
+    @classmethod
+    def check_timeout(cls, value):
+        return positive_number(value, float)
+
+    @field_validator("max_concurrency")
+    @classmethod
+    def check_concurrency(cls, value):
+        return positive_number(value, int)
 
 class ToolUpdate(BaseModel):
     name: Optional[str] = None
@@ -127,6 +151,20 @@ class ToolUpdate(BaseModel):
     client_id: Optional[str] = None
     client_secret: Optional[str] = None
     user_agent: Optional[str] = None
+    timeout_seconds: Optional[str] = None
+    max_concurrency: Optional[str] = None
+    cache_ttl_seconds: Optional[str] = None
+    max_output_tokens: Optional[str] = None
+
+    @field_validator("timeout_seconds")
+    @classmethod
+    def check_timeout(cls, value):
+        return positive_number(value, float)
+
+    @field_validator("max_concurrency")
+    @classmethod
+    def check_concurrency(cls, value):
+        return positive_number(value, int)
 
 class ToolRead(ToolBase):
     id: int
@@ -154,6 +192,9 @@ class LLMBase(BaseModel):
     model_temperature: str
     guardrail_id: Optional[str] = None
     guardrail_version: Optional[str] = None
+    max_concurrency: Optional[str] = None
+    quota_rpm: Optional[str] = None
+    quota_tpm: Optional[str] = None
     system_prompt: str
     status: str
     trashed: bool
@@ -175,6 +216,9 @@ class LLMUpdate(BaseModel):
     model_temperature: Optional[str] = None
     guardrail_id: Optional[str] = None
     guardrail_version: Optional[str] = None
+    max_concurrency: Optional[str] = None
+    quota_rpm: Optional[str] = None
+    quota_tpm: Optional[str] = None
     system_prompt: Optional[str] = None
     status: Optional[str] = None
 
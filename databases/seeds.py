@@ -3,11 +3,10 @@ from helpers.loog import logger
 from helpers.config import AppConfig
 from databases.models import RoleModel, UserModel, ToolModel, LLMModel, AgentModel, TagModel
 from sqlalchemy.future import select
-from passlib.context import CryptContext
+from helpers.authentication import ahash_user_password
 from bedrock.factory import PromptFactory
 
 app_conf = AppConfig()
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
 
 async def seed_role(session):
     """Initialize default role."""
@@ -38,11 +37,12 @@ async def seed_admin(session):
     admin_role = sql_role.scalars().first()
     
     init_admin_password = secrets.token_hex(16)
+    init_admin_hashed_password = await ahash_user_password(init_admin_password)
 
     admin_user = UserModel(
         username="administrator",
         email=app_conf.app_admin_email,
-        hashed_password=pwd_context.hash(init_admin_password),
+        hashed_password=init_admin_hashed_password,
         fullname="Administrator",
         role_id=admin_role.id
     )
@@ -64,6 +64,7 @@ async def seed_tool(session):
         {"name": "reddit", "display_name": "RedditSearch", "status": "disable", "logo": "💬", "description": "Find community discussions and opinions from Reddit.", "tags": ["Community", "Social"]},
         {"name": "searx", "display_name": "SearxSearch", "status": "disable", "logo": "🕸️", "description": "Meta search engine combining results from multiple sources.", "tags": ["Search", "Meta"]},
         {"name": "openweather", "display_name": "OpenWeather", "status": "disable", "logo": "⛅", "description": "Check current and forecasted weather conditions.", "tags": ["Utility", "Environment"]},
+        {"name": "meta_search", "display_name": "MetaSearch", "status": "disable", "logo": "🔎", "description": "Query every enabled search engine in parallel and merge the results.", "tags": ["Search", "Meta"]},
     ]
 
     for t in tools:
@@ -1,13 +1,85 @@
 import jwt
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import Header, HTTPException, status
 from helpers.secret import AWSSecretManager
 from helpers.config import AppConfig
+from helpers.metrics import metrics
 from passlib.context import CryptContext
 
 app_conf = AppConfig()
 aws_secret_manager = AWSSecretManager()
 pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
 
+# Argon2 releases the GIL while hashing, so a small dedicated thread pool keeps
+# password work off the event loop without starving the default executor.
+password_pool = ThreadPoolExecutor(
+    max_workers=int(app_conf.app_password_workers),
+    thread_name_prefix="password",
+)
+
+class VerifiedTokenCache(object):
+    """
+    Bounded LRU of already-verified bearer tokens.
+
+    Entries are keyed by a SHA-256 of the token, hold the decoded claims and
+    expire at the token's own `exp` claim (or after `default_ttl` seconds for
+    tokens without one). The whole cache is flushed when the JWT secret changes.
+    """
+
+    def __init__(self, max_size: int, default_ttl: float):
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()
+        self._secret_fingerprint = None
+
+    @staticmethod
+    def _fingerprint(value: str) -> str:
+        return hashlib.sha256((value or "").encode("utf-8")).hexdigest()
+
+    def _check_secret(self, jwt_secret: str):
+        fingerprint = self._fingerprint(jwt_secret)
+        if fingerprint != self._secret_fingerprint:
+            self._entries.clear()
+            self._secret_fingerprint = fingerprint
+
+    def get(self, token: str, jwt_secret: str):
+        self._check_secret(jwt_secret)
+        key = self._fingerprint(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, claims = entry
+        if time.time() >= expires_at:
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return claims
+
+    def set(self, token: str, jwt_secret: str, claims: dict):
+        self._check_secret(jwt_secret)
+        exp = claims.get("exp")
+        expires_at = float(exp) if isinstance(exp, (int, float)) else time.time() + self.default_ttl
+
+        key = self._fingerprint(token)
+        self._entries[key] = (expires_at, claims)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+verified_token_cache = VerifiedTokenCache(
+    max_size=int(app_conf.app_jwt_cache_size),
+    default_ttl=float(app_conf.app_jwt_cache_ttl),
+)
+
 async def verify_user_admin_auth_token(authorization: str = Header(None)):
     """
     Validate Bearer token from Authorization header.
@@ -37,8 +109,13 @@ async def verify_user_admin_auth_token(authorization: str = Header(None)):
     # Load secret from AWS Secrets Manager
     jwt_secret = aws_secret_manager.get_secret(app_conf.app_jwt_secret_key)
 
+    cached = verified_token_cache.get(credential, jwt_secret)
+    if cached is not None:
+        return cached
+
     try:
         decoded = jwt.decode(credential, jwt_secret, algorithms=["HS256"])
+        verified_token_cache.set(credential, jwt_secret, decoded)
         return decoded  # you can return user_id, roles, etc.
     except jwt.ExpiredSignatureError:
         raise HTTPException(
@@ -93,6 +170,65 @@ async def verify_yang_auth_token(
 def verify_user_password(plain, hashed):
     return pwd_context.verify(plain, hashed)
 
+def hash_user_password(plain):
+    return pwd_context.hash(plain)
+
+async def _run_in_password_pool(func, *args):
+    metrics.inc("password_pool_submitted")
+    started = time.monotonic()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(password_pool, func, *args)
+    finally:
+        metrics.observe("password_pool_seconds", time.monotonic() - started)
+
+async def averify_user_password(plain, hashed):
+    """Verify a password on the dedicated password pool."""
+    return await _run_in_password_pool(verify_user_password, plain, hashed)
+
+async def ahash_user_password(plain):
+    """Hash a password on the dedicated password pool."""
+    return await _run_in_password_pool(hash_user_password, plain)
+
+class LoginLimiter(object):
+    """
+    Concurrency limit for login password checks with a bounded wait queue.
+    Requests beyond the queue size are rejected with 429 so a login storm
+    cannot tie up the password pool.
+    """
+
+    def __init__(self, concurrency: int, queue_size: int):
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.queue_size = queue_size
+        self.waiting = 0
+
+    async def __aenter__(self):
+        if self.waiting >= self.queue_size:
+            metrics.inc("login_rejected")
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many login attempts, please retry shortly",
+                headers={"Retry-After": "1"},
+            )
+
+        self.waiting += 1
+        metrics.set_gauge("login_queue_depth", self.waiting)
+        started = time.monotonic()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+            metrics.set_gauge("login_queue_depth", self.waiting)
+        metrics.observe("login_queue_wait_seconds", time.monotonic() - started)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._semaphore.release()
+
+login_limiter = LoginLimiter(
+    concurrency=int(app_conf.app_login_concurrency),
+    queue_size=int(app_conf.app_login_queue_size),
+)
+
 def create_jwt_token(payload: dict, expires_delta: int = None):
     to_encode = payload.copy()
     jwt_secret = aws_secret_manager.get_secret(app_conf.app_jwt_secret_key)
@@ -15,7 +15,13 @@ class AppConfig(object):
     api_version_mobile: str = "v2"
     api_auth_key_name: str = os.getenv("API_AUTH_KEY_NAME", "")
     app_jwt_secret_key: str = os.getenv("APP_JWT_SECRET_KEY", "")
+    app_jwt_cache_size: str = os.getenv("APP_JWT_CACHE_SIZE", "1024")
+    app_jwt_cache_ttl: str = os.getenv("APP_JWT_CACHE_TTL", "300")  # seconds, for tokens without exp
     app_admin_email: str =  os.getenv("APP_ADMIN_EMAIL", "administrator@yang.app")
+    app_password_workers: str = os.getenv("APP_PASSWORD_WORKERS", "2")
+    app_login_concurrency: str = os.getenv("APP_LOGIN_CONCURRENCY", "4")
+    app_login_queue_size: str = os.getenv("APP_LOGIN_QUEUE_SIZE", "64")
+    app_prompt_reload_interval: str = os.getenv("APP_PROMPT_RELOAD_INTERVAL", "5")  # seconds between prompt file checks
 
 @dataclass
 class AWSConfig(object):
@@ -24,6 +30,17 @@ class AWSConfig(object):
     aws_region: str = os.getenv("AWS_REGION", "ap-southeast-1")
     
     aws_secret_name: str = os.getenv("AWS_SECRET_NAME", "")
+    aws_secret_ttl: str = os.getenv("AWS_SECRET_TTL", "300")  # seconds
+    aws_secret_refresh_before: str = os.getenv("AWS_SECRET_REFRESH_BEFORE", "60")  # seconds before expiry
+    aws_secret_retry_delay: str = os.getenv("AWS_SECRET_RETRY_DELAY", "10")  # seconds between fetches after a failure
+
+    # Shared Bedrock clients, size the pool to the expected concurrent stream count
+    bedrock_max_pool_connections: str = os.getenv("BEDROCK_MAX_POOL_CONNECTIONS", "64")
+    bedrock_connect_timeout: str = os.getenv("BEDROCK_CONNECT_TIMEOUT", "10")  # seconds
+    bedrock_read_timeout: str = os.getenv("BEDROCK_READ_TIMEOUT", "300")  # seconds
+    bedrock_retry_mode: str = os.getenv("BEDROCK_RETRY_MODE", "adaptive")  # legacy, standard or adaptive
+    bedrock_max_attempts: str = os.getenv("BEDROCK_MAX_ATTEMPTS", "3")
+    bedrock_runtime_max_attempts: str = os.getenv("BEDROCK_RUNTIME_MAX_ATTEMPTS", "1")  # total, model calls are retried by the stream layer
 
 
 @dataclass
@@ -35,6 +52,86 @@ class DatabaseConfig(object):
     db_port: str = os.getenv("DB_PORT", "5432")
     db_username_key: str = os.getenv("DB_USERNAME_KEY", "")
     db_pwd_key: str = os.getenv("DB_PWD_KEY", "")
+    db_config_channel: str = os.getenv("DB_CONFIG_CHANNEL", "yang_config_changed")  # LISTEN/NOTIFY channel
+
+@dataclass
+class ToolConfig(object):
+    """Agent tool configuration class."""
+
+    tool_workers: str = os.getenv("TOOL_WORKERS", "32")  # threads running blocking tool wrappers
+    tool_default_timeout: str = os.getenv("TOOL_DEFAULT_TIMEOUT", "20")  # seconds
+    tool_default_concurrency: str = os.getenv("TOOL_DEFAULT_CONCURRENCY", "4")  # concurrent calls per tool
+    tool_cache_size: str = os.getenv("TOOL_CACHE_SIZE", "1024")  # cached tool results
+    tool_default_cache_ttl: str = os.getenv("TOOL_DEFAULT_CACHE_TTL", "300")  # seconds, for tools without a default
+    tool_meta_search_budget: str = os.getenv("TOOL_META_SEARCH_BUDGET", "4")  # seconds to wait for search backends
+    tool_meta_search_max_results: str = os.getenv("TOOL_META_SEARCH_MAX_RESULTS", "8")
+    tool_default_output_tokens: str = os.getenv("TOOL_DEFAULT_OUTPUT_TOKENS", "800")  # per tool result
+
+    # Circuit breaker per tool
+    tool_breaker_window: str = os.getenv("TOOL_BREAKER_WINDOW", "20")  # recent calls considered
+    tool_breaker_min_calls: str = os.getenv("TOOL_BREAKER_MIN_CALLS", "5")
+    tool_breaker_failure_rate: str = os.getenv("TOOL_BREAKER_FAILURE_RATE", "0.5")
+    tool_breaker_slow_call: str = os.getenv("TOOL_BREAKER_SLOW_CALL", "10")  # seconds
+    tool_breaker_slow_call_rate: str = os.getenv("TOOL_BREAKER_SLOW_CALL_RATE", "0.8")
+    tool_breaker_open_seconds: str = os.getenv("TOOL_BREAKER_OPEN_SECONDS", "30")
+
+    # Hedged requests, only for idempotent and free providers
+    tool_hedged: str = os.getenv("TOOL_HEDGED", "duckduckgo,wikipedia,arxiv,searx")
+    tool_hedge_min_samples: str = os.getenv("TOOL_HEDGE_MIN_SAMPLES", "20")
+    tool_hedge_min_delay: str = os.getenv("TOOL_HEDGE_MIN_DELAY", "0.5")  # seconds
+
+@dataclass
+class StreamConfig(object):
+    """Chat streaming configuration class."""
+
+    stream_coalesce_ms: str = os.getenv("STREAM_COALESCE_MS", "20")  # max time a token waits for more
+    stream_coalesce_chars: str = os.getenv("STREAM_COALESCE_CHARS", "256")  # flush a frame at this size
+    stream_heartbeat_seconds: str = os.getenv("STREAM_HEARTBEAT_SECONDS", "15")  # keep-alive while idle
+    stream_disconnect_poll_seconds: str = os.getenv("STREAM_DISCONNECT_POLL_SECONDS", "0.5")  # client disconnect checks
+
+    # Resumable SSE streams per chat session
+    stream_resume_grace_seconds: str = os.getenv("STREAM_RESUME_GRACE_SECONDS", "15")  # keep generating after a disconnect
+    stream_resume_retention_seconds: str = os.getenv("STREAM_RESUME_RETENTION_SECONDS", "60")  # keep completed answers
+    stream_resume_max_bytes: str = os.getenv("STREAM_RESUME_MAX_BYTES", "33554432")  # 32 MB across all sessions
+
+    # Per-answer buffer between the model and a slow client
+    stream_buffer_high_water: str = os.getenv("STREAM_BUFFER_HIGH_WATER", "1048576")  # undelivered bytes that pause the model
+    stream_buffer_low_water: str = os.getenv("STREAM_BUFFER_LOW_WATER", "262144")  # undelivered bytes that resume it
+    stream_event_queue_size: str = os.getenv("STREAM_EVENT_QUEUE_SIZE", "256")  # model events waiting to be coalesced
+
+    # Admission control per LLM
+    stream_model_concurrency: str = os.getenv("STREAM_MODEL_CONCURRENCY", "16")  # for LLMs without max_concurrency
+    stream_model_queue_size: str = os.getenv("STREAM_MODEL_QUEUE_SIZE", "64")  # waiting requests per LLM before 429
+
+    # Exact-match response cache, opt-in
+    stream_cache_enabled: str = os.getenv("STREAM_CACHE_ENABLED", "false")
+    stream_cache_max_temperature: str = os.getenv("STREAM_CACHE_MAX_TEMPERATURE", "0")  # only cache LLMs sampling at or below this
+    stream_cache_ttl_seconds: str = os.getenv("STREAM_CACHE_TTL_SECONDS", "3600")
+    stream_cache_max_bytes: str = os.getenv("STREAM_CACHE_MAX_BYTES", "16777216")  # 16 MB, least recently used evicted first
+
+    # Semantic response cache, opt-in, searched after an exact-match miss
+    stream_semantic_cache_enabled: str = os.getenv("STREAM_SEMANTIC_CACHE_ENABLED", "false")
+    stream_semantic_embedder: str = os.getenv("STREAM_SEMANTIC_EMBEDDER", "bedrock")  # bedrock or hashing (offline)
+    stream_semantic_embed_model_id: str = os.getenv("STREAM_SEMANTIC_EMBED_MODEL_ID", "amazon.titan-embed-text-v2:0")
+    stream_semantic_hashing_dim: str = os.getenv("STREAM_SEMANTIC_HASHING_DIM", "1024")
+    stream_semantic_threshold: str = os.getenv("STREAM_SEMANTIC_THRESHOLD", "0.92")  # cosine similarity for a hit
+    stream_semantic_max_temperature: str = os.getenv("STREAM_SEMANTIC_MAX_TEMPERATURE", "1")  # separate from STREAM_CACHE_MAX_TEMPERATURE
+    stream_semantic_ttl_seconds: str = os.getenv("STREAM_SEMANTIC_TTL_SECONDS", "3600")
+    stream_semantic_max_entries: str = os.getenv("STREAM_SEMANTIC_MAX_ENTRIES", "2000")  # per agent, oldest evicted first
+
+    # Batch completions, admitted behind interactive chat
+    stream_batch_concurrency: str = os.getenv("STREAM_BATCH_CONCURRENCY", "4")  # items in flight per batch by default
+    stream_batch_max_concurrency: str = os.getenv("STREAM_BATCH_MAX_CONCURRENCY", "16")  # cap on a batch's own setting
+    stream_batch_max_items: str = os.getenv("STREAM_BATCH_MAX_ITEMS", "1000")  # prompts per batch request
+    stream_batch_reserved_slots: str = os.getenv("STREAM_BATCH_RESERVED_SLOTS", "2")  # per-LLM slots batches never take
+
+    # Client-side Bedrock quotas per (model id, region) and throttling retries
+    stream_default_rpm: str = os.getenv("STREAM_DEFAULT_RPM", "0")  # requests per minute, 0 = unlimited
+    stream_default_tpm: str = os.getenv("STREAM_DEFAULT_TPM", "0")  # tokens per minute, 0 = unlimited
+    stream_quota_max_wait: str = os.getenv("STREAM_QUOTA_MAX_WAIT", "5")  # seconds to wait for quota before falling back
+    stream_retry_attempts: str = os.getenv("STREAM_RETRY_ATTEMPTS", "3")  # per model, before the first token only
+    stream_retry_base_delay: str = os.getenv("STREAM_RETRY_BASE_DELAY", "0.5")  # seconds, jittered exponential backoff
+    stream_retry_max_delay: str = os.getenv("STREAM_RETRY_MAX_DELAY", "8")  # seconds
 
 @dataclass
 class LogConfig(object):
@@ -29,6 +29,7 @@ class ChatAgentRequest(BaseModel):
     agent_name: str
     model_name: str
     messages: List[ChatAgentMessage]
+    user_id: Optional[str] = None # fair queueing key, defaults to chat_session_id
 
 class ChatLLMMessage(BaseModel):
     role: Literal["user", "assistant"]
@@ -37,4 +38,16 @@ class ChatLLMMessage(BaseModel):
 class ChatLLMRequest(BaseModel):
     chat_session_id: str
     model_name: str
-    messages: List[ChatLLMMessage]
\ No newline at end of file
+    messages: List[ChatLLMMessage]
+    user_id: Optional[str] = None # fair queueing key, defaults to chat_session_id
+
+class ChatBatchItem(BaseModel):
+    id: str # caller's id, echoed on its result
+    messages: List[ChatAgentMessage]
+
+class ChatBatchRequest(BaseModel):
+    model_name: str
+    agent_name: Optional[str] = None # run every item through this agent, else the bare LLM
+    items: List[ChatBatchItem]
+    concurrency: Optional[int] = None # items in flight, defaults to STREAM_BATCH_CONCURRENCY
+    user_id: Optional[str] = None
\ No newline at end of file
@@ -0,0 +1,81 @@
+import threading
+from collections import deque
+
+class Metrics(object):
+    """
+    Minimal in-process metrics registry.
+
+    Counters and gauges keep a single value per (name, labels). Histograms keep
+    count/sum/min/max plus a bounded window of recent samples for percentiles.
+    Everything is exposed as a plain dict through `snapshot()`.
+    """
+
+    def __init__(self, window: int = 1024):
+        self.window = window
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+
+    @staticmethod
+    def _key(name: str, labels: dict) -> str:
+        if not labels:
+            return name
+        label_str = ",".join(f"{k}={v}" for k, v in sorted(labels.items()))
+        return f"{name}{{{label_str}}}"
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name: str, value: float, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = {"count": 0, "sum": 0.0, "min": value, "max": value, "samples": deque(maxlen=self.window)}
+                self._histograms[key] = hist
+            hist["count"] += 1
+            hist["sum"] += value
+            hist["min"] = min(hist["min"], value)
+            hist["max"] = max(hist["max"], value)
+            hist["samples"].append(value)
+
+    def percentile(self, name: str, q: float, min_samples: int = 1, **labels):
+        """Return the q-th percentile (0-100) of the recent samples, or None with fewer than `min_samples`."""
+        key = self._key(name, labels)
+        with self._lock:
+            hist = self._histograms.get(key)
+            samples = sorted(hist["samples"]) if hist else []
+        if not samples or len(samples) < min_samples:
+            return None
+        index = min(len(samples) - 1, int(round(q / 100 * (len(samples) - 1))))
+        return samples[index]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            histograms = {}
+            for key, hist in self._histograms.items():
+                samples = sorted(hist["samples"])
+                histograms[key] = {
+                    "count": hist["count"],
+                    "sum": hist["sum"],
+                    "min": hist["min"],
+                    "max": hist["max"],
+                    "p50": samples[int(0.50 * (len(samples) - 1))],
+                    "p95": samples[int(0.95 * (len(samples) - 1))],
+                    "p99": samples[int(0.99 * (len(samples) - 1))],
+                }
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "histograms": histograms,
+            }
+
+metrics = Metrics()
@@ -1,15 +1,107 @@
+import json
+import time
 import boto3
+import threading
 from helpers.config import AppConfig, AWSConfig
-from botocore.exceptions import ClientError
+from botocore.exceptions import BotoCoreError, ClientError
 from helpers.loog import logger
 
+class SecretStore(object):
+    """
+    Process-wide cache of the AWS Secrets Manager blob.
+
+    The secret string is fetched once, parsed as JSON and every key is served
+    from memory. Shortly before the TTL expires a single background refresh is
+    started while readers keep getting the current values, also past the TTL
+    until the refresh lands. Only the very first read blocks, on one shared
+    fetch; call `warm()` off the event loop at start-up so that is not a
+    request. After a failed fetch the previous values (or none) are served,
+    Secrets Manager is not asked again for `retry_delay` seconds and the next
+    attempt runs in the background.
+    """
+
+    def __init__(self, fetch, ttl: float, refresh_before: float, retry_delay: float):
+        self._fetch = fetch
+        self.ttl = ttl
+        self.refresh_before = min(refresh_before, ttl)
+        self.retry_delay = retry_delay
+        self._values = None
+        self._fetched_at = 0.0
+        self._retry_at = 0.0
+        self._attempted = False  # a fetch has completed, successfully or not
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._idle = threading.Event()  # set while no fetch is in flight
+        self._idle.set()
+
+    def _age(self) -> float:
+        return time.monotonic() - self._fetched_at
+
+    def _load(self):
+        """Fetch and parse the blob. Must be called with `_refreshing` claimed."""
+        try:
+            values = json.loads(self._fetch())
+            if not isinstance(values, dict):
+                raise ValueError("secret string is not a JSON object")
+            self._values = values
+            self._fetched_at = time.monotonic()
+            self._retry_at = 0.0
+        except (ClientError, BotoCoreError, KeyError, TypeError, ValueError) as e:
+            # Keep serving the previous values if we have any, and back off before the next fetch
+            self._retry_at = time.monotonic() + self.retry_delay
+            logger.error(f"[BE-AWS] Error refreshing secret store: {e}")
+        finally:
+            with self._lock:
+                self._attempted = True
+                self._refreshing = False
+                self._idle.set()
+
+    def _claim_refresh(self) -> bool:
+        with self._lock:
+            if self._refreshing:
+                return False
+            self._refreshing = True
+            self._idle.clear()
+            return True
+
+    def _refresh_in_background(self):
+        if self._claim_refresh():
+            threading.Thread(target=self._load, name="secret-store-refresh", daemon=True).start()
+
+    def _refresh_blocking(self):
+        if self._claim_refresh():
+            self._load()
+            return
+        # Another caller is already fetching, wait for it instead of issuing a second call
+        self._idle.wait()
+
+    def values(self) -> dict:
+        if time.monotonic() < self._retry_at:
+            return self._values or {}
+        if not self._attempted:
+            self._refresh_blocking()
+        elif self._values is None or self._age() >= self.ttl - self.refresh_before:
+            self._refresh_in_background()
+        return self._values or {}
+
+    def warm(self):
+        """Do the first, blocking fetch now. Call it from a worker thread in async code."""
+        self.values()
+
+    def invalidate(self):
+        """Force the next read to fetch the secret again."""
+        self._fetched_at = 0.0
+
 class AWSSecretManager(object):
 
+    _store = None
+    _store_lock = threading.Lock()
+
     def __init__(self):
         self.app_conf = AppConfig()
         self.aws_conf = AWSConfig()
         self._client = None
-    
+
     @property
     def client(self):
         if self._client is None:
@@ -19,17 +111,31 @@ class AWSSecretManager(object):
                 region_name=self.aws_conf.aws_region
             )
         return self._client
-    
+
+    @property
+    def store(self) -> SecretStore:
+        # One store per process, shared by every AWSSecretManager instance
+        if AWSSecretManager._store is None:
+            with AWSSecretManager._store_lock:
+                if AWSSecretManager._store is None:
+                    AWSSecretManager._store = SecretStore(
+                        fetch=self._fetch_secret_string,
+                        ttl=float(self.aws_conf.aws_secret_ttl),
+                        refresh_before=float(self.aws_conf.aws_secret_refresh_before),
+                        retry_delay=float(self.aws_conf.aws_secret_retry_delay),
+                    )
+        return AWSSecretManager._store
+
+    def _fetch_secret_string(self) -> str:
+        get_secret_value_response = self.client.get_secret_value(
+            SecretId=self.aws_conf.aws_secret_name
+        )
+        return get_secret_value_response['SecretString']
+
     def get_secret(self, secret_key: str) -> str:
-        try:
-            
-            get_secret_value_response = self.client.get_secret_value(
-                SecretId=self.aws_conf.aws_secret_name
-            )
-            secret_value = get_secret_value_response['SecretString']
-            secret = eval(secret_value).get(secret_key, "")
+        values = self.store.values()
+        if not values:
+            logger.error(f"[BE-AWS] Error retrieving secret {secret_key}: secret store is empty")
+            return None
 
-            return secret
-        except ClientError as e:
-            logger.error(f"[BE-AWS] Error retrieving secret {secret_key}: {e}")
-            return None
\ No newline at end of file
+        return values.get(secret_key, "")
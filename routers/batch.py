@@ -0,0 +1,63 @@
+from fastapi import APIRouter, Depends
+from helpers.authentication import verify_yang_auth_token
+from helpers.config import AppConfig, StreamConfig
+from helpers.datamodel import ChatBatchRequest
+from helpers.utils import Utils
+from fastapi.responses import StreamingResponse, JSONResponse
+from bedrock.stream import streaming
+from bedrock.batch import BatchRunner
+from bedrock.frames import NDJSON_MEDIA_TYPE, ndjson_frame
+import traceback
+from helpers.loog import logger
+
+batch_runner = BatchRunner(streaming)
+app_conf = AppConfig()
+stream_conf = StreamConfig()
+
+router = APIRouter(prefix=f"/{app_conf.api_version_web}/chat", tags=["Chats"])
+
+def item_events(req: ChatBatchRequest, item_id: str, message_payload: dict):
+    chat_id = f"batch-{item_id}"
+    if req.agent_name:
+        return lambda: streaming.agent_astreaming(chat_id=chat_id, message=message_payload, agent_name=req.agent_name, model_name=req.model_name, stream_mode="messages")
+    return lambda: streaming.llm_astreaming(chat_id=chat_id, message=message_payload, model_name=req.model_name, prompt_variables={"user_id": req.user_id})
+
+async def ndjson(results):
+    async for result in results:
+        yield ndjson_frame(result)
+
+@router.post(f"/batch/completions", dependencies=[Depends(verify_yang_auth_token)])
+async def chat_batch_completions(req: ChatBatchRequest):
+    """
+    Run many prompts against one LLM (or agent) at batch priority. Results stream
+    back as NDJSON in completion order, one {"type": "result", "id": ...} line
+    per item, followed by a {"type": "summary"} line.
+    """
+    try:
+        if not req.items:
+            return JSONResponse(status_code=400, content={"error": "No items provided"})
+        if len(req.items) > int(stream_conf.stream_batch_max_items):
+            return JSONResponse(status_code=400, content={"error": f"At most {stream_conf.stream_batch_max_items} items per batch"})
+        if len({item.id for item in req.items}) != len(req.items):
+            return JSONResponse(status_code=400, content={"error": "Item ids must be unique"})
+
+        items = []
+        for item in req.items:
+            formatted_messages = Utils.format_agent_messages(item.messages)
+            if not formatted_messages:
+                return JSONResponse(status_code=400, content={"error": f"No messages provided for item {item.id}"})
+            items.append((item.id, item_events(req, item.id, {"messages": formatted_messages})))
+
+        concurrency = min(
+            req.concurrency or int(stream_conf.stream_batch_concurrency),
+            int(stream_conf.stream_batch_max_concurrency),
+        )
+        results = batch_runner.run(items, req.model_name, req.user_id or "batch", concurrency)
+        return StreamingResponse(ndjson(results), media_type=NDJSON_MEDIA_TYPE)
+
+    except Exception as e:
+        logger.error(f"An error occurred: {e} \n TRACEBACK: ", traceback.format_exc())
+        return JSONResponse(
+            status_code=500,
+            content={"error": str(e)}
+        )
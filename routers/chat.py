@@ -1,18 +1,68 @@
-from fastapi import Request, APIRouter, Depends, HTTPException
+import asyncio
+from fastapi import Request, APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, status
+from pydantic import ValidationError
+from starlette.websockets import WebSocketState
 from helpers.authentication import verify_yang_auth_token
 from helpers.config import AppConfig
 from helpers.datamodel import ChatAgentRequest, ChatLLMRequest
+from helpers.metrics import metrics
 from helpers.utils import Utils
 from fastapi.responses import StreamingResponse, JSONResponse
-from bedrock.stream import Streaming
+from bedrock.stream import streaming
+from bedrock.frames import SSE_MEDIA_TYPE, TEXT_MEDIA_TYPE, SSE_HEADERS, ws_frame
+from bedrock.resume import resumable_streams
+from bedrock.admission import AdmissionRejected
 import traceback
 from helpers.loog import logger
 
-streaming = Streaming()
 app_conf = AppConfig()
 
 router = APIRouter(prefix=f"/{app_conf.api_version_web}/chat", tags=["Chats"])
 
+async def admit(http_req: Request, model_name: str, user: str):
+    """
+    Queue for a stream slot on the model. Returns (slot, client gone); the place
+    in the queue is given up as soon as the client disconnects.
+    """
+    task = asyncio.ensure_future(streaming.admit(model_name, user))
+    poll = float(streaming.stream_conf.stream_disconnect_poll_seconds)
+    while not task.done():
+        await asyncio.wait({task}, timeout=poll)
+        if not task.done() and await http_req.is_disconnected():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                return None, True
+    return task.result(), False
+
+async def stream_response(http_req: Request, req, make_events):
+    """
+    SSE for clients that accept text/event-stream, the original plain text stream otherwise.
+    An SSE request carrying `Last-Event-ID` continues the session's buffered answer
+    instead of invoking the model again, when that answer is still available.
+    New answers wait for a slot on the model and get 429 when its queue is full.
+    """
+    sse = SSE_MEDIA_TYPE in http_req.headers.get("accept", "")
+    media_type = SSE_MEDIA_TYPE if sse else TEXT_MEDIA_TYPE
+    headers = SSE_HEADERS if sse else None
+
+    last_event_id = http_req.headers.get("last-event-id")
+    if sse and last_event_id:
+        frames = streaming.resume_frames(req.chat_session_id, last_event_id, http_req=http_req)
+        if frames is not None:
+            return StreamingResponse(frames, media_type=media_type, headers=headers)
+
+    try:
+        slot, gone = await admit(http_req, req.model_name, req.user_id or req.chat_session_id)
+    except AdmissionRejected as e:
+        return JSONResponse(status_code=429, content={"error": str(e)}, headers={"Retry-After": str(e.retry_after)})
+    if gone:
+        return JSONResponse(status_code=499, content={"error": "Client closed request"})
+
+    frames = streaming.frames(req.chat_session_id, make_events(), sse=sse, http_req=http_req, slot=slot)
+    return StreamingResponse(frames, media_type=media_type, headers=headers)
+
 @router.post(f"/agent/completions", dependencies=[Depends(verify_yang_auth_token)])
 async def chat_agent_completions(req: ChatAgentRequest, http_req: Request):
     try:
@@ -23,7 +73,7 @@ async def chat_agent_completions(req: ChatAgentRequest, http_req: Request):
 
         message_payload = {"messages": formatted_messages}
         
-        return StreamingResponse(streaming.agent_astreaming(chat_id=req.chat_session_id, message=message_payload, agent_name=req.agent_name, model_name=req.model_name, stream_mode="messages"), media_type="text/html")
+        return await stream_response(http_req, req, lambda: streaming.agent_astreaming(chat_id=req.chat_session_id, message=message_payload, agent_name=req.agent_name, model_name=req.model_name, stream_mode="messages"))
 
     except Exception as e:
         logger.error(f"An error occurred: {e} \n TRACEBACK: ", traceback.format_exc())
@@ -42,11 +92,159 @@ async def chat_llm_completions(req: ChatLLMRequest, http_req: Request):
         
         message_payload = {"messages": formatted_messages}
 
-        return StreamingResponse(streaming.llm_astreaming(chat_id=req.chat_session_id, message=message_payload, model_name=req.model_name), media_type="text/html")
+        return await stream_response(http_req, req, lambda: streaming.llm_astreaming(chat_id=req.chat_session_id, message=message_payload, model_name=req.model_name, prompt_variables={"user_id": req.user_id}))
 
     except Exception as e:
         logger.error(f"An error occurred: {e} \n TRACEBACK: ", traceback.format_exc())
         return JSONResponse(
             status_code=500,
             content={"error": str(e)}
-        )
\ No newline at end of file
+        )
+
+@router.get("/sessions/{chat_session_id}/stream", dependencies=[Depends(verify_yang_auth_token)])
+async def chat_session_stream(chat_session_id: str, http_req: Request):
+    """Resume the session's current answer as SSE, after `Last-Event-ID` or from the start."""
+    frames = streaming.resume_frames(chat_session_id, http_req.headers.get("last-event-id"), http_req=http_req)
+    if frames is None:
+        return JSONResponse(status_code=404, content={"error": "No resumable stream for this session"})
+    return StreamingResponse(frames, media_type=SSE_MEDIA_TYPE, headers=SSE_HEADERS)
+
+def prepare_ws_turn(data: dict):
+    """Validate a WebSocket chat message; returns the request and a factory for its events."""
+    if data.get("agent_name"):
+        req = ChatAgentRequest(**data)
+    else:
+        req = ChatLLMRequest(**data)
+
+    formatted_messages = Utils.format_agent_messages(req.messages)
+    if not formatted_messages:
+        raise ValueError("No messages provided")
+
+    message_payload = {"messages": formatted_messages}
+    if isinstance(req, ChatAgentRequest):
+        return req, lambda: streaming.agent_astreaming(chat_id=req.chat_session_id, message=message_payload, agent_name=req.agent_name, model_name=req.model_name, stream_mode="messages")
+    return req, lambda: streaming.llm_astreaming(chat_id=req.chat_session_id, message=message_payload, model_name=req.model_name, prompt_variables={"user_id": req.user_id})
+
+@router.websocket("/ws")
+async def chat_websocket(websocket: WebSocket):
+    """
+    Many chat turns, for any number of sessions, over one connection.
+
+    Authenticate with the `x-yang-auth` header or a first
+    {"type": "auth", "authorization": "Basic <key>"} message, then send:
+      {"type": "chat", "id": <turn id>, "chat_session_id": ..., "model_name": ..., "messages": [...], "agent_name": <optional>}
+      {"type": "resume", "id": <turn id>, "chat_session_id": ..., "last_event_id": <optional>}
+      {"type": "cancel", "id": <turn id>}
+    Answers come back as {"id": <turn id>, "type": "token" | "done" | "error", ...}
+    messages, interleaved across turns.
+    """
+    await websocket.accept()
+
+    authorization = websocket.headers.get("x-yang-auth")
+    if authorization is None:
+        try:
+            first = await websocket.receive_json()
+        except (WebSocketDisconnect, ValueError):
+            return
+        if isinstance(first, dict) and first.get("type") == "auth":
+            authorization = first.get("authorization")
+    try:
+        await verify_yang_auth_token(x_yang_auth=authorization)
+    except HTTPException as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=str(e.detail))
+        return
+
+    send_lock = asyncio.Lock()
+    turns = {}  # turn id -> {"task": follower task, "stream": stream once started}
+
+    async def send(message: dict):
+        async with send_lock:
+            await websocket.send_json(message)
+
+    async def follow_turn(turn_id: str, stream=None, after: int = 0, req=None, make_events=None):
+        try:
+            if stream is None:
+                try:
+                    slot = await streaming.admit(req.model_name, req.user_id or req.chat_session_id)
+                except AdmissionRejected as e:
+                    await send({"type": "error", "id": turn_id, "code": "busy", "message": str(e), "retry_after": e.retry_after})
+                    return
+                stream = streaming.start(req.chat_session_id, make_events(), slot=slot)
+                turns[turn_id]["stream"] = stream
+
+            async for event in streaming.follow(stream, after):
+                if event["type"] != "heartbeat":
+                    await send(ws_frame(event, turn_id, stream.session_id))
+        except (WebSocketDisconnect, RuntimeError, OSError):
+            pass  # socket closed under us
+        except Exception as e:
+            logger.error(f"[WS] turn {turn_id} failed: {e} \n TRACEBACK: {traceback.format_exc()}")
+            if websocket.client_state == WebSocketState.CONNECTED:
+                try:
+                    await send({"type": "error", "id": turn_id, "code": "internal", "message": str(e)})
+                except (WebSocketDisconnect, RuntimeError, OSError):
+                    pass
+        finally:
+            turns.pop(turn_id, None)
+
+    metrics.inc("ws_connections_opened")
+    await send({"type": "ready"})
+    try:
+        while True:
+            try:
+                data = await websocket.receive_json()
+            except ValueError:
+                await send({"type": "error", "code": "bad_request", "message": "Messages must be JSON objects"})
+                continue
+            if not isinstance(data, dict):
+                await send({"type": "error", "code": "bad_request", "message": "Messages must be JSON objects"})
+                continue
+
+            kind = data.get("type")
+            turn_id = str(data.get("id") or "")
+
+            if kind == "ping":
+                await send({"type": "pong", "id": turn_id})
+                continue
+
+            if kind == "cancel":
+                turn = turns.pop(turn_id, None)
+                if turn:
+                    turn["task"].cancel()
+                    if turn["stream"] is not None:
+                        turn["stream"].cancel()
+                    metrics.inc("ws_turns_cancelled")
+                await send({"type": "cancelled", "id": turn_id})
+                continue
+
+            if kind not in ("chat", "resume"):
+                await send({"type": "error", "id": turn_id, "code": "bad_request", "message": f"Unknown message type: {kind}"})
+                continue
+            if not turn_id or turn_id in turns:
+                await send({"type": "error", "id": turn_id, "code": "bad_request", "message": "Each turn needs a unique id"})
+                continue
+
+            if kind == "chat":
+                try:
+                    req, make_events = prepare_ws_turn({k: v for k, v in data.items() if k not in ("type", "id")})
+                except (ValidationError, ValueError) as e:
+                    await send({"type": "error", "id": turn_id, "code": "bad_request", "message": str(e)})
+                    continue
+                metrics.inc("ws_turns")
+                turns[turn_id] = {"task": None, "stream": None}
+                turns[turn_id]["task"] = asyncio.ensure_future(follow_turn(turn_id, req=req, make_events=make_events))
+            else:
+                found = resumable_streams.resume(str(data.get("chat_session_id") or ""), data.get("last_event_id"))
+                if found is None:
+                    await send({"type": "error", "id": turn_id, "code": "not_found", "message": "No resumable stream for this session"})
+                    continue
+                stream, after = found
+                turns[turn_id] = {"task": None, "stream": stream}
+                turns[turn_id]["task"] = asyncio.ensure_future(follow_turn(turn_id, stream, after))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        # Unfinished answers stay resumable for the grace period, then are cancelled
+        for turn in list(turns.values()):
+            turn["task"].cancel()
+        metrics.inc("ws_connections_closed")
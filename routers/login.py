@@ -7,7 +7,7 @@ from databases.crud import (
     get_user_by_username
 )
 from databases.database import get_db
-from helpers.authentication import verify_yang_auth_token, verify_user_password, create_jwt_token
+from helpers.authentication import verify_yang_auth_token, averify_user_password, create_jwt_token, login_limiter
 from helpers.config import AppConfig
 
 app_conf = AppConfig()
@@ -30,7 +30,10 @@ async def user_login_route(payload: LoginRequest, db: AsyncSession = Depends(get
             detail="Incorrect username or password",
         )
 
-    if not verify_user_password(password, user.hashed_password):
+    async with login_limiter:
+        password_ok = await averify_user_password(password, user.hashed_password)
+
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -8,6 +8,7 @@ from databases.crud import (
 from databases.database import get_db
 from helpers.authentication import verify_yang_auth_token, verify_user_admin_auth_token
 from helpers.config import AppConfig
+from tools.breaker import tool_breakers
 
 app_conf = AppConfig()
 
@@ -29,6 +30,17 @@ async def list_enabled_tools_route(db: AsyncSession = Depends(get_db)):
     return await get_enabled_tools(db)
 
 
+@router.get("/breakers", dependencies=[Depends(verify_yang_auth_token)])
+async def list_tool_breakers_route():
+    return tool_breakers.snapshot()
+
+
+@router.post("/breakers/{tool_name}/reset", dependencies=[Depends(verify_yang_auth_token)])
+async def reset_tool_breaker_route(tool_name: str):
+    tool_breakers.get(tool_name).reset()
+    return tool_breakers.get(tool_name).snapshot()
+
+
 @router.get("/{tool_id}", dependencies=[Depends(verify_yang_auth_token)], response_model=ToolOut)
 async def get_tool_route(tool_id: int, db: AsyncSession = Depends(get_db)):
     tool = await get_tool(db, tool_id)
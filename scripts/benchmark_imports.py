@@ -0,0 +1,93 @@
+"""
+Report import time per module for the service's entry points.
+
+Each target is imported in a fresh interpreter with `-X importtime`, so the
+numbers match a cold container start. Usage:
+
+    python scripts/benchmark_imports.py                     # default targets
+    python scripts/benchmark_imports.py app --top 30        # one target, top 30 modules
+    python scripts/benchmark_imports.py bedrock.factory --min-ms 5
+
+Note: importing `app` (or anything that pulls in `databases.database`) reads
+secrets from AWS Secrets Manager, so run it with credentials configured.
+"""
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+DEFAULT_TARGETS = [
+    "tools.web_search",
+    "bedrock.factory",
+    "bedrock.stream",
+    "app",
+]
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+def measure(target: str):
+    """Import `target` in a new interpreter and return (wall seconds, rows, error)."""
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=ROOT_DIR,
+        capture_output=True,
+        text=True,
+    )
+    wall = time.perf_counter() - started
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            rows.append((int(self_us), int(cumulative_us), name.rstrip()))
+        except ValueError:
+            continue
+
+    error = None
+    if proc.returncode != 0:
+        error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit code {proc.returncode}"
+    return wall, rows, error
+
+def report(target: str, top: int, min_ms: float):
+    wall, rows, error = measure(target)
+    total_ms = sum(r[0] for r in rows) / 1000
+
+    print(f"\n=== {target}: {wall * 1000:.0f} ms wall, {total_ms:.0f} ms importing {len(rows)} modules")
+    if error:
+        print(f"    ! import failed: {error}")
+
+    # Top-level packages by self time, then individual modules by cumulative time
+    packages = {}
+    for self_us, _, name in rows:
+        package = name.strip().split(".")[0]
+        packages[package] = packages.get(package, 0) + self_us
+
+    print(f"    {'package':<40} {'self ms':>10}")
+    for package, self_us in sorted(packages.items(), key=lambda p: p[1], reverse=True)[:top]:
+        if self_us / 1000 < min_ms:
+            break
+        print(f"    {package:<40} {self_us / 1000:>10.1f}")
+
+    print(f"    {'module':<60} {'cumulative ms':>14}")
+    for _, cumulative_us, name in sorted(rows, key=lambda r: r[1], reverse=True)[:top]:
+        if cumulative_us / 1000 < min_ms:
+            break
+        print(f"    {name:<60} {cumulative_us / 1000:>14.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold import time per module.")
+    parser.add_argument("targets", nargs="*", default=DEFAULT_TARGETS, help="modules to import")
+    parser.add_argument("--top", type=int, default=20, help="rows to show per table")
+    parser.add_argument("--min-ms", type=float, default=1.0, help="hide rows below this many milliseconds")
+    args = parser.parse_args()
+
+    for target in args.targets:
+        report(target, args.top, args.min_ms)
+
+if __name__ == "__main__":
+    main()
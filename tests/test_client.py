@@ -0,0 +1,22 @@
+from bedrock.client import BedrockClientRegistry
+from helpers.metrics import metrics
+
+def pool_gauge(region: str):
+    return metrics.snapshot()["gauges"].get(f"bedrock_pool_in_use{{region={region},service=bedrock-runtime}}")
+
+def test_pool_in_use_counts_checked_out_connections():
+    registry = BedrockClientRegistry()
+    client = registry.get("bedrock-runtime", "eu-west-3")
+    assert pool_gauge("eu-west-3") == 0
+
+    # What urllib3 does for a request, without sending one
+    manager = client._endpoint.http_session._manager
+    pool = manager.connection_from_url(client.meta.endpoint_url)
+    first, second = pool._get_conn(), pool._get_conn()
+    registry.publish_pool_usage()
+    assert pool_gauge("eu-west-3") == 2
+
+    pool._put_conn(first)
+    pool._put_conn(second)
+    registry.publish_pool_usage()
+    assert pool_gauge("eu-west-3") == 0
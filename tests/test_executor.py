@@ -0,0 +1,49 @@
+import time
+import asyncio
+from types import SimpleNamespace
+from tools.breaker import OPEN, HALF_OPEN, tool_breakers
+from tools.executor import tool_executor
+
+class SlowTool(object):
+    def run(self, query: str) -> str:
+        time.sleep(0.2)
+        return f"result for {query}"
+
+def test_cancelled_half_open_probe_lets_the_next_call_probe():
+    async def scenario():
+        breaker = tool_breakers.get("test_probe_tool")
+        breaker._set_state(OPEN)
+        breaker.opened_at = time.monotonic() - breaker.open_seconds
+
+        db_tool = SimpleNamespace(timeout_seconds="5", max_concurrency="1")
+        probe = asyncio.ensure_future(
+            tool_executor._execute("test_probe_tool", db_tool, "query", lambda db_tool: SlowTool())
+        )
+        await asyncio.sleep(0.05)
+        assert breaker.state == HALF_OPEN
+        assert not breaker.allow()  # the probe is in flight
+
+        probe.cancel()
+        try:
+            await probe
+        except asyncio.CancelledError:
+            pass
+
+        assert breaker.state == HALF_OPEN
+        assert breaker.allow()
+
+    asyncio.run(scenario())
+
+def test_malformed_limits_fall_back_to_defaults_and_release_the_probe():
+    async def scenario():
+        breaker = tool_breakers.get("test_bad_limits_tool")
+        breaker._set_state(OPEN)
+        breaker.opened_at = time.monotonic() - breaker.open_seconds
+
+        db_tool = SimpleNamespace(name="test_bad_limits_tool", timeout_seconds="abc", max_concurrency="-2")
+        ok, result = await tool_executor._execute("test_bad_limits_tool", db_tool, "query", lambda db_tool: SlowTool())
+        assert ok
+        assert result == "result for query"
+        assert breaker.state != HALF_OPEN
+
+    asyncio.run(scenario())
@@ -0,0 +1,17 @@
+from tools.meta_search import merge_results
+
+def test_results_without_snippets_are_not_merged_by_content():
+    merged = merge_results({
+        "duckduckgo": [{"title": "A", "link": "https://a.com", "snippet": ""}, {"title": "C", "link": "https://c.com"}],
+        "searx": [{"title": "B", "link": "https://b.com", "snippet": " "}],
+    }, max_results=10)
+    assert sorted(entry["link"] for entry in merged) == ["https://a.com", "https://b.com", "https://c.com"]
+
+def test_results_with_the_same_snippet_are_merged():
+    snippet = "Refunds are issued within 30 days of purchase."
+    merged = merge_results({
+        "duckduckgo": [{"title": "Refunds", "link": "https://shop.com/refunds", "snippet": snippet}],
+        "searx": [{"title": "Refunds", "link": "https://m.shop.com/refunds?utm_source=x", "snippet": snippet}],
+    }, max_results=10)
+    assert len(merged) == 1
+    assert merged[0]["sources"] == ["duckduckgo", "searx"]
@@ -0,0 +1,45 @@
+import asyncio
+from bedrock.resume import ResumableStreams
+
+def make_streams():
+    return ResumableStreams(retention=60, max_bytes=1_000_000, grace=0, high_water=1_000_000, low_water=0)
+
+async def answer(*texts):
+    for text in texts:
+        yield {"type": "text", "text": text}
+    yield {"type": "done"}
+
+async def collect(stream, after=0):
+    return [event async for event in stream.follow(after, heartbeat=60) if event["type"] != "heartbeat"]
+
+def test_non_resumable_stream_keeps_events_produced_before_the_first_follower():
+    async def scenario():
+        stream = make_streams().start("sess", answer("hello", " world"), resumable=False)
+        await stream.task  # the whole answer is produced before anyone follows it
+        events = await collect(stream)
+        assert [event["type"] for event in events] == ["text", "text", "done"]
+        assert "".join(event.get("text", "") for event in events) == "hello world"
+
+    asyncio.run(scenario())
+
+def test_non_resumable_stream_does_not_replace_the_sessions_resumable_stream():
+    async def scenario():
+        streams = make_streams()
+        gate = asyncio.Event()
+
+        async def slow():
+            yield {"type": "text", "text": "first"}
+            await gate.wait()
+            yield {"type": "done"}
+
+        retained = streams.start("sess", slow())
+        other = streams.start("sess", answer("second"), resumable=False)
+        await other.task
+        assert streams.resume("sess")[0] is retained
+        assert not retained.task.done()
+
+        gate.set()
+        await retained.task
+        assert [event["type"] for event in await collect(retained)] == ["text", "done"]
+
+    asyncio.run(scenario())
@@ -0,0 +1,28 @@
+import time
+import threading
+from helpers.secret import SecretStore
+
+def test_non_string_secret_is_a_failed_load_and_the_retry_does_not_block():
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        if len(calls) == 1:
+            return None  # e.g. a binary secret without SecretString
+        release.wait(5)
+        return '{"jwt_secret": "s3cret"}'
+
+    store = SecretStore(fetch, ttl=100, refresh_before=10, retry_delay=0.01)
+    store.warm()
+    assert store.values() == {}
+
+    time.sleep(0.02)
+    started = time.monotonic()
+    assert store.values() == {}  # retried in the background
+    assert time.monotonic() - started < 1
+
+    release.set()
+    store._idle.wait(5)
+    assert store.values() == {"jwt_secret": "s3cret"}
+    assert len(calls) == 2
@@ -0,0 +1,110 @@
+import asyncio
+import numpy as np
+from types import SimpleNamespace
+from bedrock import semantic
+from bedrock.semantic import HashingEmbedder, SemanticCache, SemanticIndex
+
+def user_turn(*blocks):
+    return {"role": "user", "content": list(blocks)}
+
+def text(value):
+    return {"type": "text", "text": value}
+
+def image(data):
+    return {"type": "image", "source": {"type": "base64", "media_type": "image/png", "data": data}}
+
+def make_cache(threshold=0.9):
+    return SemanticCache("hashing", threshold=threshold, ttl=60, max_entries=10)
+
+async def ask(cache, *blocks, answer=None):
+    """Look a question up and, on a miss, store `answer` for it. Returns the cached answer or None."""
+    parts = {"agent": "helper", "model_id": "model", "messages": [user_turn(*blocks)]}
+    events, probe = await cache.lookup(parts)
+    if events is None and probe is not None and answer is not None:
+        cache.store(probe, [{"type": "text", "text": answer}, {"type": "done"}])
+    return events
+
+def unit(dim, axis):
+    vector = np.zeros(dim, dtype=np.float32)
+    vector[axis] = 1
+    return vector
+
+def fake_clock(monkeypatch, start=1000.0):
+    now = [start]
+    monkeypatch.setattr(semantic, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+def test_hashing_embedder_is_deterministic_and_normalized():
+    async def scenario():
+        embedder = HashingEmbedder(256)
+        first = await embedder.embed("How do refunds work?")
+        assert first.shape == (256,)
+        assert np.isclose(np.linalg.norm(first), 1)
+        assert np.array_equal(first, await HashingEmbedder(256).embed("How do refunds work?"))
+
+        paraphrase = await embedder.embed("how do refunds work")
+        unrelated = await embedder.embed("Deploy the cluster to eu-west-1")
+        assert float(first @ paraphrase) > float(first @ unrelated)
+
+    asyncio.run(scenario())
+
+def test_index_grows_by_doubling_and_keeps_rows():
+    index = SemanticIndex(dim=8, ttl=60, max_entries=40)
+    assert len(index.created) == SemanticIndex.INITIAL_CAPACITY
+    for row in range(20):
+        index.add(unit(8, row % 8), "scope", [row])
+    assert len(index.created) == 32
+    assert len(index) == 20
+    matches = index.search(unit(8, 3), "scope", k=3)
+    assert sorted(index.answers[row] for _, row in matches) == [[3], [11], [19]]
+
+def test_full_index_overwrites_the_oldest_row():
+    index = SemanticIndex(dim=4, ttl=60, max_entries=5)
+    for row in range(7):
+        index.add(unit(4, 0), f"scope-{row}", [row])
+    assert len(index.created) == 5
+    assert len(index) == 5
+    assert index.search(unit(4, 0), "scope-0") == []
+    assert index.search(unit(4, 0), "scope-1") == []
+    similarity, row = index.search(unit(4, 0), "scope-6")[0]
+    assert index.answers[row] == [6]
+
+def test_index_only_matches_live_rows_of_the_same_scope(monkeypatch):
+    now = fake_clock(monkeypatch)
+    index = SemanticIndex(dim=4, ttl=10, max_entries=5)
+    index.add(unit(4, 0), "alice", ["old"])
+    now[0] += 8
+    index.add(unit(4, 0), "alice", ["new"])
+    assert index.search(unit(4, 0), "bob") == []
+
+    now[0] += 5  # the first row expired
+    assert len(index) == 1
+    matches = index.search(unit(4, 0), "alice", k=2)
+    assert [index.answers[row] for _, row in matches] == [["new"]]
+
+    now[0] += 10
+    assert len(index) == 0
+    assert index.search(unit(4, 0), "alice") == []
+
+def test_cache_hits_at_the_threshold_and_misses_below_it():
+    async def scenario():
+        cache = make_cache(threshold=0.9)
+        assert await ask(cache, text("What is your refund policy?"), answer="30 days") is None
+        hit = await ask(cache, text("what is your refund policy"))
+        assert hit[0]["text"] == "30 days"
+        assert await ask(cache, text("Which regions do you deploy to?")) is None
+
+        strict = make_cache(threshold=1.01)
+        await ask(strict, text("What is your refund policy?"), answer="30 days")
+        assert await ask(strict, text("What is your refund policy?")) is None
+
+    asyncio.run(scenario())
+
+def test_turns_with_images_are_never_served_from_the_semantic_cache():
+    async def scenario():
+        cache = make_cache()
+        assert await ask(cache, text("What is in this picture?"), image("AAA"), answer="a cat") is None
+        assert await ask(cache, text("What is in this picture?"), image("BBB"), answer="a dog") is None
+        assert await ask(cache, text("What is in this picture?"), {"document": {"name": "doc"}}) is None
+
+    asyncio.run(scenario())
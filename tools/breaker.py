@@ -0,0 +1,136 @@
+import time
+import threading
+from collections import deque
+from helpers.config import ToolConfig
+from helpers.metrics import metrics
+
+tool_conf = ToolConfig()
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitBreaker(object):
+    """
+    Failure-rate and latency based circuit breaker for one tool.
+
+    The breaker looks at the last `window` calls. Once at least `min_calls` have
+    been seen it opens when the failure rate or the share of slow calls crosses
+    its threshold. While open every call fails fast; after `open_seconds` one
+    probe call is let through (half-open) and its outcome closes or re-opens it.
+    """
+
+    def __init__(self, name: str, window: int, min_calls: int, failure_rate: float,
+                 slow_call_seconds: float, slow_call_rate: float, open_seconds: float):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.state = CLOSED
+        self.opened_at = None
+        self.last_error = None
+        self._calls = deque(maxlen=window)  # (ok, slow)
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def _set_state(self, state: str):
+        self.state = state
+        metrics.set_gauge("tool_breaker_open", 0 if state == CLOSED else 1, tool=self.name)
+        if state == OPEN:
+            self.opened_at = time.monotonic()
+            metrics.inc("tool_breaker_opened", tool=self.name)
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.open_seconds:
+                self._set_state(HALF_OPEN)
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            metrics.inc("tool_breaker_rejected", tool=self.name)
+            return False
+
+    def record(self, ok: bool, latency: float, error: str = None):
+        slow = latency >= self.slow_call_seconds
+        with self._lock:
+            if not ok:
+                self.last_error = error
+
+            if self.state == HALF_OPEN:
+                self._probe_in_flight = False
+                if ok and not slow:
+                    self._calls.clear()
+                    self._set_state(CLOSED)
+                else:
+                    self._set_state(OPEN)
+                return
+
+            self._calls.append((ok, slow))
+            if self.state == CLOSED and len(self._calls) >= self.min_calls:
+                failures = sum(1 for c in self._calls if not c[0]) / len(self._calls)
+                slow_calls = sum(1 for c in self._calls if c[1]) / len(self._calls)
+                if failures >= self.failure_rate or slow_calls >= self.slow_call_rate:
+                    self._set_state(OPEN)
+
+    def release_probe(self):
+        """The half-open probe was cancelled without an outcome; let the next call probe instead."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probe_in_flight = False
+
+    def reset(self):
+        with self._lock:
+            self._calls.clear()
+            self._probe_in_flight = False
+            self._set_state(CLOSED)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            calls = len(self._calls)
+            failures = sum(1 for c in self._calls if not c[0])
+            slow_calls = sum(1 for c in self._calls if c[1])
+            retry_in = None
+            if self.state == OPEN:
+                retry_in = max(0.0, self.open_seconds - (time.monotonic() - self.opened_at))
+            return {
+                "state": self.state,
+                "calls": calls,
+                "failure_rate": failures / calls if calls else 0.0,
+                "slow_call_rate": slow_calls / calls if calls else 0.0,
+                "retry_in_seconds": retry_in,
+                "last_error": self.last_error,
+            }
+
+class BreakerRegistry(object):
+    """One circuit breaker per tool name, created on first use."""
+
+    def __init__(self):
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def get(self, tool_name: str) -> CircuitBreaker:
+        breaker = self._breakers.get(tool_name)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.get(tool_name)
+                if breaker is None:
+                    breaker = CircuitBreaker(
+                        name=tool_name,
+                        window=int(tool_conf.tool_breaker_window),
+                        min_calls=int(tool_conf.tool_breaker_min_calls),
+                        failure_rate=float(tool_conf.tool_breaker_failure_rate),
+                        slow_call_seconds=float(tool_conf.tool_breaker_slow_call),
+                        slow_call_rate=float(tool_conf.tool_breaker_slow_call_rate),
+                        open_seconds=float(tool_conf.tool_breaker_open_seconds),
+                    )
+                    self._breakers[tool_name] = breaker
+        return breaker
+
+    def snapshot(self) -> dict:
+        return {name: breaker.snapshot() for name, breaker in self._breakers.items()}
+
+tool_breakers = BreakerRegistry()
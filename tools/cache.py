@@ -0,0 +1,75 @@
+import json
+import time
+import unicodedata
+from collections import OrderedDict
+from helpers.config import ToolConfig
+from helpers.metrics import metrics
+
+tool_conf = ToolConfig()
+
+# Default TTL in seconds per tool when the tool row does not set cache_ttl_seconds.
+# News and weather go stale quickly, encyclopedic and academic results do not.
+DEFAULT_TOOL_CACHE_TTL = {
+    "asknews": 120,
+    "openweather": 300,
+    "google_trends": 900,
+    "duckduckgo": 600,
+    "google_search": 600,
+    "searx": 600,
+    "reddit": 600,
+    "wikipedia": 86400,
+    "arxiv": 86400,
+    "google_scholar": 86400,
+}
+
+def normalize_query(query: str) -> str:
+    """Case-fold, NFKC-normalize and collapse whitespace so trivial variants share a key."""
+    query = unicodedata.normalize("NFKC", query or "")
+    return " ".join(query.casefold().split())
+
+class ToolResultCache(object):
+    """
+    Bounded LRU of tool results keyed by (tool name, normalized query, parameters).
+    Each entry carries its own expiry so TTLs can differ per tool.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def make_key(tool_name: str, query: str, params: dict = None) -> tuple:
+        return (tool_name, normalize_query(query), json.dumps(params or {}, sort_keys=True, default=str))
+
+    @staticmethod
+    def ttl_for(tool_name: str, db_tool) -> float:
+        ttl = getattr(db_tool, "cache_ttl_seconds", None)
+        if ttl not in (None, ""):
+            return float(ttl)
+        return float(DEFAULT_TOOL_CACHE_TTL.get(tool_name, tool_conf.tool_default_cache_ttl))
+
+    def get(self, key: tuple):
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() >= entry[0]:
+            if entry is not None:
+                del self._entries[key]
+            metrics.inc("tool_cache_misses", tool=key[0])
+            return None
+
+        self._entries.move_to_end(key)
+        metrics.inc("tool_cache_hits", tool=key[0])
+        return entry[1]
+
+    def set(self, key: tuple, value: str, ttl: float):
+        if ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        metrics.set_gauge("tool_cache_entries", len(self._entries))
+
+    def clear(self):
+        self._entries.clear()
+
+tool_result_cache = ToolResultCache(max_size=int(tool_conf.tool_cache_size))
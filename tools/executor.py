@@ -0,0 +1,226 @@
+import json
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from helpers.loog import logger
+from helpers.config import ToolConfig
+from helpers.metrics import metrics
+from databases.registry import config_registry
+from tools.cache import tool_result_cache
+from tools.instances import tool_instances
+from tools.breaker import tool_breakers, HALF_OPEN
+from tools.shaping import shape_tool_output
+
+tool_conf = ToolConfig()
+
+def tool_error(tool_name: str, error: str, message: str) -> str:
+    """Structured error returned to the agent instead of raising."""
+    return json.dumps({"status": "error", "tool": tool_name, "error": error, "message": message})
+
+class ToolExecutor(object):
+    """
+    Runs the blocking LangChain tool wrappers off the event loop.
+
+    Each call goes to a dedicated thread pool, bounded by a per-tool semaphore
+    and a per-tool timeout (both read from the tool row, falling back to
+    TOOL_DEFAULT_CONCURRENCY / TOOL_DEFAULT_TIMEOUT). A timeout or failure is
+    returned to the agent as a structured error string.
+
+    Successful results are cached per (tool, normalized query, parameters) and
+    identical calls already in flight share a single provider request. Tool
+    objects come from `tool_instances`, so warm HTTP sessions are reused.
+
+    Calls pass through a per-tool circuit breaker that fails fast while the
+    provider is unhealthy, and tools listed in TOOL_HEDGED get a duplicate
+    request once the first has run longer than their recent p95 latency.
+    """
+
+    def __init__(self):
+        self._pool = ThreadPoolExecutor(
+            max_workers=int(tool_conf.tool_workers),
+            thread_name_prefix="tool",
+        )
+        self._semaphores = {}  # tool name -> (limit, semaphore)
+        self._in_flight = {}  # cache key -> task
+        self._waiters = {}  # cache key -> callers awaiting the in-flight task
+        self._background = set()  # cache keys whose call must finish even without callers
+        self._hedged_tools = {t.strip() for t in tool_conf.tool_hedged.split(",") if t.strip()}
+
+    def _semaphore(self, tool_name: str, limit: int) -> asyncio.Semaphore:
+        current = self._semaphores.get(tool_name)
+        if current is None or current[0] != limit:
+            current = (limit, asyncio.Semaphore(limit))
+            self._semaphores[tool_name] = current
+        return current[1]
+
+    @staticmethod
+    def _limit(db_tool, field: str, cast, default: str):
+        """A numeric setting of the tool row, or the default when it is unset or malformed."""
+        value = getattr(db_tool, field, None)
+        if value:
+            try:
+                parsed = cast(value)
+                if parsed > 0:
+                    return parsed
+            except (TypeError, ValueError):
+                pass
+            logger.warning(f"[Tool] {getattr(db_tool, 'name', '?')} has invalid {field} {value!r}, using {default}")
+        return cast(default)
+
+    @classmethod
+    def _limits(cls, db_tool):
+        timeout = cls._limit(db_tool, "timeout_seconds", float, tool_conf.tool_default_timeout)
+        concurrency = cls._limit(db_tool, "max_concurrency", int, tool_conf.tool_default_concurrency)
+        return timeout, max(1, concurrency)
+
+    async def run(self, tool_name: str, search_query: str, build, params: dict = None, shape: bool = True, background: bool = False) -> str:
+        """
+        Run `build(db_tool).run(search_query)` in the tool pool and return its text result.
+        `params` are the wrapper settings `build` uses; they are part of the cache keys.
+        With `shape`, the result is cut down to the tool's output budget for the model.
+
+        When every caller is cancelled (e.g. the chat client disconnected) the call
+        is cancelled too, unless one of them asked for it to finish in the
+        `background` so the result still reaches the cache.
+        """
+        db_tool = await config_registry.get_tool(tool_name)
+        key = tool_result_cache.make_key(tool_name, search_query, params)
+        cached = tool_result_cache.get(key)
+        if cached is not None:
+            return shape_tool_output(tool_name, db_tool, search_query, cached) if shape else cached
+
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._execute(tool_name, db_tool, search_query, build, params))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda t: self._on_done(key, tool_name, db_tool, t))
+        else:
+            metrics.inc("tool_calls_coalesced", tool=tool_name)
+
+        if background:
+            self._background.add(key)
+
+        # Shielded so one caller going away does not cancel the call for the others
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            ok, result = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._waiters.get(key) == 1 and key not in self._background and not task.done():
+                metrics.inc("tool_calls_abandoned", tool=tool_name)
+                task.cancel()
+            raise
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+        return shape_tool_output(tool_name, db_tool, search_query, result) if shape else result
+
+    def _on_done(self, key: tuple, tool_name: str, db_tool, task: asyncio.Task):
+        self._in_flight.pop(key, None)
+        self._background.discard(key)
+        if task.cancelled() or task.exception() is not None:
+            return
+        ok, result = task.result()
+        if ok:
+            tool_result_cache.set(key, result, tool_result_cache.ttl_for(tool_name, db_tool))
+
+    @staticmethod
+    def _invoke(instance_key: tuple, build, db_tool, search_query: str) -> str:
+        """Runs in a worker thread: check out a tool instance, query it, hand it back."""
+        instance = tool_instances.acquire(instance_key, build, db_tool)
+        try:
+            return instance.run(search_query)
+        finally:
+            tool_instances.release(instance_key, instance)
+
+    def _hedge_delay(self, tool_name: str):
+        """p95 of recent successful call latency, or None when the tool is not hedged."""
+        if tool_name not in self._hedged_tools:
+            return None
+        p95 = metrics.percentile("tool_call_seconds", 95, min_samples=int(tool_conf.tool_hedge_min_samples), tool=tool_name)
+        if p95 is None:
+            return None
+        return max(float(tool_conf.tool_hedge_min_delay), p95)
+
+    async def _execute(self, tool_name: str, db_tool, search_query: str, build, params: dict = None):
+        """Return (ok, text) for one provider call."""
+        timeout, concurrency = self._limits(db_tool)
+        breaker = tool_breakers.get(tool_name)
+        if not breaker.allow():
+            return False, tool_error(
+                tool_name,
+                "circuit_open",
+                f"{tool_name} is temporarily unavailable after repeated failures. Try another tool.",
+            )
+        probe = breaker.state == HALF_OPEN
+
+        instance_key = tool_instances.make_key(tool_name, db_tool, params)
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        call_started = {}
+
+        semaphore = self._semaphore(tool_name, concurrency)
+
+        def on_attempt_done(future, attempt_started):
+            # A timed-out thread keeps running, so only free its slot once it really finishes
+            semaphore.release()
+            if not future.cancelled() and future.exception() is None:
+                metrics.observe("tool_call_seconds", time.monotonic() - attempt_started, tool=tool_name)
+
+        async def submit():
+            await semaphore.acquire()
+            metrics.inc("tool_calls", tool=tool_name)
+            attempt_started = time.monotonic()
+            call_started.setdefault("at", attempt_started)
+            future = loop.run_in_executor(self._pool, self._invoke, instance_key, build, db_tool, search_query)
+            future.add_done_callback(lambda f: on_attempt_done(f, attempt_started))
+            return future
+
+        async def call_with_slot():
+            attempts = {await submit()}
+
+            # Idempotent tools get a second request once the first is slower than usual
+            delay = self._hedge_delay(tool_name)
+            if delay is not None:
+                done, _ = await asyncio.wait(attempts, timeout=delay)
+                if not done and not semaphore.locked():
+                    metrics.inc("tool_hedged_calls", tool=tool_name)
+                    attempts.add(await submit())
+
+            # First successful attempt wins; only fail once every attempt has failed
+            error = None
+            while attempts:
+                done, attempts = await asyncio.wait(attempts, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        return future.result()
+                    error = future.exception()
+            raise error
+
+        def call_latency():
+            return time.monotonic() - call_started.get("at", started)
+
+        try:
+            # The timeout covers waiting for a slot as well as the call itself
+            result = await asyncio.wait_for(call_with_slot(), timeout)
+            breaker.record(True, call_latency())
+            return True, result
+        except asyncio.CancelledError:
+            # Nobody waits for the result any more, which says nothing about the provider
+            if probe:
+                breaker.release_probe()
+            raise
+        except asyncio.TimeoutError:
+            breaker.record(False, call_latency(), "timeout")
+            metrics.inc("tool_timeouts", tool=tool_name)
+            logger.error(f"[Tool] {tool_name} timed out after {timeout:.1f}s")
+            return False, tool_error(tool_name, "timeout", f"{tool_name} did not respond within {timeout:g} seconds.")
+        except Exception as e:
+            breaker.record(False, call_latency(), str(e))
+            metrics.inc("tool_errors", tool=tool_name)
+            logger.error(f"[Tool] {tool_name} failed: {e}")
+            return False, tool_error(tool_name, "failed", str(e))
+        finally:
+            metrics.observe("tool_seconds", time.monotonic() - started, tool=tool_name)
+
+tool_executor = ToolExecutor()
@@ -0,0 +1,57 @@
+import json
+import hashlib
+import threading
+from helpers.metrics import metrics
+
+# Tool row fields that feed the wrapper constructors
+CREDENTIAL_FIELDS = ("host", "api_key", "cse_id", "client_id", "client_secret", "user_agent")
+
+class ToolInstanceRegistry(object):
+    """
+    Reusable LangChain tool objects per (tool name, credential set, parameters).
+
+    Building a wrapper costs a DB-free but still expensive constructor (new HTTP
+    session, API discovery for Google, ...), so instances are kept and reused.
+    Some wrappers are not thread-safe (httplib2 for Google), so each instance is
+    checked out by one thread at a time; idle instances wait in a per-key list.
+    When a tool's credentials change, idle instances built with the old ones
+    are dropped and the next call builds fresh ones.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._idle = {}  # key -> [instance, ...]
+        self._fingerprints = {}  # tool name -> current credential fingerprint
+
+    @staticmethod
+    def fingerprint(db_tool) -> str:
+        fields = {f: getattr(db_tool, f, None) for f in CREDENTIAL_FIELDS}
+        return hashlib.sha256(json.dumps(fields, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def make_key(self, tool_name: str, db_tool, params: dict = None) -> tuple:
+        fingerprint = self.fingerprint(db_tool)
+        with self._lock:
+            if self._fingerprints.get(tool_name) != fingerprint:
+                # Credentials changed, drop instances built with the old ones
+                for key in [k for k in self._idle if k[0] == tool_name]:
+                    del self._idle[key]
+                self._fingerprints[tool_name] = fingerprint
+        return (tool_name, fingerprint, json.dumps(params or {}, sort_keys=True, default=str))
+
+    def acquire(self, key: tuple, build, db_tool):
+        """Check out an idle instance for `key`, or build one. Call from a worker thread."""
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop()
+
+        metrics.inc("tool_instances_built", tool=key[0])
+        return build(db_tool)
+
+    def release(self, key: tuple, instance):
+        with self._lock:
+            # Only keep it if the credentials are still current
+            if self._fingerprints.get(key[0]) == key[1]:
+                self._idle.setdefault(key, []).append(instance)
+
+tool_instances = ToolInstanceRegistry()
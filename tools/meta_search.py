@@ -0,0 +1,151 @@
+import json
+import asyncio
+import hashlib
+from typing import Optional
+from urllib.parse import urlsplit, parse_qsl, urlencode
+from langchain.tools import tool
+from helpers.config import ToolConfig
+from helpers.metrics import metrics
+from databases.registry import config_registry
+from tools.executor import tool_executor
+from tools.shaping import shape_tool_output
+
+tool_conf = ToolConfig()
+
+class ResultsSearch(object):
+    """Expose a wrapper's structured `results()` through the `.run()` the executor calls."""
+
+    def __init__(self, wrapper, num_results: int):
+        self.wrapper = wrapper
+        self.num_results = num_results
+
+    def run(self, query: str) -> str:
+        return json.dumps(self.wrapper.results(query, self.num_results))
+
+def build_duckduckgo(db_tool, num_results: int):
+    from langchain_community.utilities import DuckDuckGoSearchAPIWrapper
+    return ResultsSearch(DuckDuckGoSearchAPIWrapper(), num_results)
+
+def build_google_search(db_tool, num_results: int):
+    from langchain_google_community import GoogleSearchAPIWrapper
+    wrapper = GoogleSearchAPIWrapper(google_api_key=db_tool.api_key, google_cse_id=db_tool.cse_id)
+    return ResultsSearch(wrapper, num_results)
+
+def build_searx(db_tool, num_results: int):
+    from langchain_community.utilities import SearxSearchWrapper
+    return ResultsSearch(SearxSearchWrapper(searx_host=db_tool.host), num_results)
+
+# Tool name -> builder of a `.run(query)` object returning a JSON list of
+# {"title", "link", "snippet"} dicts
+SEARCH_BACKENDS = {
+    "duckduckgo": build_duckduckgo,
+    "google_search": build_google_search,
+    "searx": build_searx,
+}
+
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid")
+
+# Shorter snippets ("", "...", a site name) say nothing about the page
+MIN_CONTENT_KEY_CHARS = 20
+
+def normalize_url(url: str) -> str:
+    """Drop scheme, www., fragment, tracking params and trailing slash."""
+    parts = urlsplit((url or "").strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[len("www."):]
+    query = [(k, v) for k, v in parse_qsl(parts.query) if not k.lower().startswith(TRACKING_PARAMS)]
+    path = parts.path.rstrip("/")
+    return f"{host}{path}" + (f"?{urlencode(query)}" if query else "")
+
+def content_key(snippet: str) -> Optional[str]:
+    """Hash of the normalized snippet, or None when it is too short to identify a page."""
+    text = " ".join((snippet or "").casefold().split())[:200]
+    if len(text) < MIN_CONTENT_KEY_CHARS:
+        return None
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+def merge_results(results_by_backend: dict, max_results: int, rrf_k: int = 60) -> list:
+    """
+    Deduplicate by URL and by snippet content, then rank with reciprocal rank
+    fusion: a result found high up by several backends beats one found by one.
+    """
+    merged = {}
+    url_index = {}
+    content_index = {}
+
+    for backend, results in results_by_backend.items():
+        for rank, item in enumerate(results):
+            link = item.get("link")
+            if not link:
+                continue  # "No good Search Result was found" placeholders
+
+            url_key = normalize_url(link)
+            snippet_key = content_key(item.get("snippet", ""))
+            key = url_index.get(url_key) or (snippet_key and content_index.get(snippet_key)) or url_key
+
+            entry = merged.get(key)
+            if entry is None:
+                entry = {"title": item.get("title", ""), "link": link, "snippet": item.get("snippet", ""), "score": 0.0, "sources": []}
+                merged[key] = entry
+            elif len(item.get("snippet", "")) > len(entry["snippet"]):
+                entry["snippet"] = item["snippet"]
+
+            entry["score"] += 1.0 / (rrf_k + rank + 1)
+            if backend not in entry["sources"]:
+                entry["sources"].append(backend)
+            url_index[url_key] = key
+            if snippet_key:
+                content_index[snippet_key] = key
+
+    ranked = sorted(merged.values(), key=lambda e: e["score"], reverse=True)
+    return ranked[:max_results]
+
+async def search_backend(tool_name: str, db_tool, search_query: str, num_results: int) -> list:
+    params = {"mode": "results", "num_results": num_results}
+    raw = await tool_executor.run(
+        tool_name,
+        search_query,
+        lambda row: SEARCH_BACKENDS[tool_name](row, num_results),
+        params,
+        shape=False,
+        background=True,
+    )
+    try:
+        results = json.loads(raw)
+    except (TypeError, ValueError):
+        return []
+    # Executor errors come back as a JSON object, not a list
+    return results if isinstance(results, list) else []
+
+@tool
+async def MetaSearch(search_query: str):
+    """Search the web with every enabled search engine at once and return merged, deduplicated results."""
+    meta_tool = await config_registry.get_tool("meta_search")
+    budget = float(getattr(meta_tool, "timeout_seconds", None) or tool_conf.tool_meta_search_budget)
+    max_results = int(tool_conf.tool_meta_search_max_results)
+
+    enabled = {t.name: t for t in await config_registry.get_enabled_tools() if t.name in SEARCH_BACKENDS}
+    if not enabled:
+        return "No search backends are enabled."
+
+    tasks = {
+        asyncio.ensure_future(search_backend(name, db_tool, search_query, max_results)): name
+        for name, db_tool in enabled.items()
+    }
+    # Whatever has not answered within the budget is left to finish in the
+    # background; its result still lands in the tool cache for the next query.
+    done, pending = await asyncio.wait(tasks, timeout=budget)
+    for task in pending:
+        metrics.inc("meta_search_late_backends", tool=tasks[task])
+        task.cancel()
+
+    results_by_backend = {tasks[t]: t.result() for t in done if not t.cancelled() and t.exception() is None}
+    ranked = merge_results(results_by_backend, max_results)
+    if not ranked:
+        return "No good search result was found."
+
+    lines = []
+    for i, entry in enumerate(ranked, start=1):
+        lines.append(f"{i}. {entry['title']}\n   {entry['link']}\n   {entry['snippet']}\n   (sources: {', '.join(entry['sources'])})")
+    return shape_tool_output("meta_search", meta_tool, search_query, "\n".join(lines))
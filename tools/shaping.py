@@ -0,0 +1,131 @@
+import re
+from helpers.config import ToolConfig
+from helpers.metrics import metrics
+
+tool_conf = ToolConfig()
+
+# Rough size of a token for budget purposes; Bedrock models average ~4 chars per token
+CHARS_PER_TOKEN = 4
+
+BOILERPLATE_PATTERNS = [
+    re.compile(p, re.IGNORECASE) for p in (
+        r"\b(accept|manage) (all )?cookies?\b.*",
+        r"\bthis (web)?site uses cookies\b.*",
+        r"\b(sign|log) ?in\b.{0,40}\b(to continue|to see|to read)\b.*",
+        r"\bsubscribe (now|to our newsletter)\b.*",
+        r"\ball rights reserved\b.*",
+        r"\bclick here\b.*",
+        r"\benable javascript\b.*",
+        r"\bskip to (main )?content\b",
+        r"\bread more\b\s*(\.\.\.|…)?$",
+    )
+]
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in", "is", "it",
+    "of", "on", "or", "that", "the", "to", "was", "what", "when", "where", "which", "who", "why", "with",
+}
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def _terms(text: str) -> set:
+    return {w for w in WORD_RE.findall(text.casefold()) if w not in STOPWORDS}
+
+def _split_passages(text: str, max_passage_chars: int = 600) -> list:
+    """Split on line breaks; overly long lines are split again on sentence boundaries."""
+    passages = []
+    for line in text.splitlines():
+        line = " ".join(line.split())
+        if not line:
+            continue
+        if len(line) <= max_passage_chars:
+            passages.append(line)
+            continue
+
+        current = ""
+        for sentence in SENTENCE_RE.split(line):
+            if current and len(current) + len(sentence) + 1 > max_passage_chars:
+                passages.append(current)
+                current = sentence
+            else:
+                current = f"{current} {sentence}".strip()
+        if current:
+            passages.append(current)
+    return passages
+
+def _strip_boilerplate(passage: str) -> str:
+    for pattern in BOILERPLATE_PATTERNS:
+        passage = pattern.sub("", passage)
+    return passage.strip(" -|•·")
+
+def _is_duplicate(terms: set, kept_terms: list, threshold: float = 0.8) -> bool:
+    if not terms:
+        return False
+    for other in kept_terms:
+        union = len(terms | other)
+        if union and len(terms & other) / union >= threshold:
+            return True
+    return False
+
+def shape_output(text: str, query: str, max_tokens: int) -> str:
+    """
+    Strip boilerplate and duplicate passages from a tool result, then, if it is
+    still over `max_tokens`, keep the passages that overlap the query most
+    (earlier passages win ties) and return them in their original order.
+    """
+    passages = []
+    kept_terms = []
+    for passage in _split_passages(text):
+        passage = _strip_boilerplate(passage)
+        terms = _terms(passage)
+        if not passage or _is_duplicate(terms, kept_terms):
+            continue
+        passages.append((passage, terms))
+        kept_terms.append(terms)
+
+    cleaned = "\n".join(p for p, _ in passages)
+    if estimate_tokens(cleaned) <= max_tokens:
+        return cleaned
+
+    query_terms = _terms(query)
+    scored = []
+    for index, (passage, terms) in enumerate(passages):
+        overlap = len(query_terms & terms) / len(query_terms) if query_terms else 0.0
+        scored.append((overlap, -index, index, passage))
+    scored.sort(reverse=True)
+
+    budget_chars = max_tokens * CHARS_PER_TOKEN
+    selected = []
+    used = 0
+    for _, _, index, passage in scored:
+        if used + len(passage) + 1 > budget_chars:
+            if not selected:
+                # Keep at least the best passage, cut to the budget
+                selected.append((index, passage[:budget_chars].rstrip() + " …"))
+            continue
+        selected.append((index, passage))
+        used += len(passage) + 1
+
+    dropped = len(passages) - len(selected)
+    shaped = "\n".join(p for _, p in sorted(selected))
+    if dropped:
+        shaped += f"\n[{dropped} less relevant passages omitted]"
+    return shaped
+
+def shape_tool_output(tool_name: str, db_tool, query: str, text: str) -> str:
+    """Apply the tool row's `max_output_tokens` (or TOOL_DEFAULT_OUTPUT_TOKENS) to a tool result."""
+    if not isinstance(text, str) or text.startswith('{"status": "error"'):
+        return text
+
+    max_tokens = int(getattr(db_tool, "max_output_tokens", None) or tool_conf.tool_default_output_tokens)
+    if max_tokens <= 0:
+        return text
+
+    shaped = shape_output(text, query, max_tokens)
+    metrics.observe("tool_output_tokens_raw", estimate_tokens(text), tool=tool_name)
+    metrics.observe("tool_output_tokens", estimate_tokens(shaped), tool=tool_name)
+    return shaped
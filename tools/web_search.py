@@ -1,157 +1,188 @@
 from langchain.tools import tool
-from langchain_community.utilities import (
-    DuckDuckGoSearchAPIWrapper,
-    ArxivAPIWrapper,
-    WikipediaAPIWrapper,
-    GoogleTrendsAPIWrapper,
-    GoogleScholarAPIWrapper,
-    AskNewsAPIWrapper,
-    SearxSearchWrapper,
-)
-
-from langchain_google_community import GoogleSearchAPIWrapper
-from langchain_community.utilities.reddit_search import RedditSearchAPIWrapper
-from langchain_community.tools.google_scholar import GoogleScholarQueryRun
-from langchain_community.tools.google_trends import GoogleTrendsQueryRun
-from langchain_community.utilities.openweathermap import OpenWeatherMapAPIWrapper
-from langchain_community.tools import (
-    DuckDuckGoSearchRun,
-    ArxivQueryRun,
-    WikipediaQueryRun,
-    GoogleSearchRun,
-    AskNewsSearch,
-    OpenWeatherMapQueryRun,
-    RedditSearchRun,
-    SearxSearchRun,
-)
-
-from databases.crud import get_tool_by_name
-from databases.database import SessionLocal
-
-async def get_tool_conf(tool_name: str):
-    """Fetch tool credentials from the database."""
-    async with SessionLocal() as session:
-        return await get_tool_by_name(session, tool_name)
-    
+from tools.executor import tool_executor
+
+# Provider wrappers are imported inside each tool's `build` so importing this
+# module stays cheap. `build` turns a tool row into a LangChain tool object; the
+# executor keeps those objects per credential set and runs their blocking HTTP
+# in a thread pool with the tool's timeout and concurrency limit.
+
 @tool
 async def DuckDuckGo(search_query: str):
     """Perform web search using DuckDuckGo."""
-    db_tool = await get_tool_conf("duckduckgo")
-    duckduckgo_wrapper = DuckDuckGoSearchAPIWrapper(max_results=5)
-    return DuckDuckGoSearchRun(
-        name="DuckDuckGoSearch",
-        api_wrapper=duckduckgo_wrapper,
-        description="Use this tool for general-purpose web searches when you need up-to-date or privacy-preserving results.",
-    ).run(search_query)
+    params = {"max_results": 5}
+
+    def build(db_tool):
+        from langchain_community.utilities import DuckDuckGoSearchAPIWrapper
+        from langchain_community.tools import DuckDuckGoSearchRun
+
+        duckduckgo_wrapper = DuckDuckGoSearchAPIWrapper(**params)
+        return DuckDuckGoSearchRun(
+            name="DuckDuckGoSearch",
+            api_wrapper=duckduckgo_wrapper,
+            description="Use this tool for general-purpose web searches when you need up-to-date or privacy-preserving results.",
+        )
+
+    return await tool_executor.run("duckduckgo", search_query, build, params)
 
 @tool
 async def Arxiv(search_query: str):
     """Perform academic paper search via Arxiv."""
-    db_tool = await get_tool_conf("arxiv")
-    arxiv_wrapper = ArxivAPIWrapper(top_k_results=3, doc_content_chars_max=500)
-    return ArxivQueryRun(
-        name="ArxivSearch",
-        api_wrapper=arxiv_wrapper,
-        description="Use this tool to search and summarize academic or scientific papers from Arxiv. Ideal for technical or research topics.",
-    ).run(search_query)
+    params = {"top_k_results": 3, "doc_content_chars_max": 500}
+
+    def build(db_tool):
+        from langchain_community.utilities import ArxivAPIWrapper
+        from langchain_community.tools import ArxivQueryRun
+
+        arxiv_wrapper = ArxivAPIWrapper(**params)
+        return ArxivQueryRun(
+            name="ArxivSearch",
+            api_wrapper=arxiv_wrapper,
+            description="Use this tool to search and summarize academic or scientific papers from Arxiv. Ideal for technical or research topics.",
+        )
+
+    return await tool_executor.run("arxiv", search_query, build, params)
 
 @tool
 async def Wikipedia(search_query: str):
     """Perform encyclopedia search via Wikipedia."""
-    db_tool = await get_tool_conf("wikipedia")
-    wiki_wrapper = WikipediaAPIWrapper(top_k_results=3, doc_content_chars_max=500)
-    return WikipediaQueryRun(
-        name="WikipediaSearch",
-        api_wrapper=wiki_wrapper,
-        description="Use this tool for general factual or historical information from Wikipedia.",
-    ).run(search_query)
+    params = {"top_k_results": 3, "doc_content_chars_max": 500}
+
+    def build(db_tool):
+        from langchain_community.utilities import WikipediaAPIWrapper
+        from langchain_community.tools import WikipediaQueryRun
+
+        wiki_wrapper = WikipediaAPIWrapper(**params)
+        return WikipediaQueryRun(
+            name="WikipediaSearch",
+            api_wrapper=wiki_wrapper,
+            description="Use this tool for general factual or historical information from Wikipedia.",
+        )
+
+    return await tool_executor.run("wikipedia", search_query, build, params)
 
 @tool
 async def GoogleSearch(search_query: str):
     """Perform web search using Google."""
-    db_tool = await get_tool_conf("google_search")
-    google_wrapper = GoogleSearchAPIWrapper(
-        google_api_key=db_tool.api_key,
-        google_cse_id=db_tool.cse_id,
-    )
-    return GoogleSearchRun(
-        name="GoogleSearch",
-        api_wrapper=google_wrapper,
-        description="Use this tool for broad and up-to-date web searches using Google.",
-    ).run(search_query)
+    def build(db_tool):
+        from langchain_google_community import GoogleSearchAPIWrapper
+        from langchain_community.tools import GoogleSearchRun
+
+        google_wrapper = GoogleSearchAPIWrapper(
+            google_api_key=db_tool.api_key,
+            google_cse_id=db_tool.cse_id,
+        )
+        return GoogleSearchRun(
+            name="GoogleSearch",
+            api_wrapper=google_wrapper,
+            description="Use this tool for broad and up-to-date web searches using Google.",
+        )
+
+    return await tool_executor.run("google_search", search_query, build)
 
 @tool
 async def GoogleScholar(search_query: str):
     """Perform academic search via Google Scholar."""
-    db_tool = await get_tool_conf("google_scholar")
-    scholar_wrapper = GoogleScholarAPIWrapper(
-        top_k_results=5,
-        serp_api_key=db_tool.api_key,
-    )
-    return GoogleScholarQueryRun(
-        name="GoogleScholarSearch",
-        api_wrapper=scholar_wrapper,
-        description="Use this tool to find peer-reviewed research papers from Google Scholar.",
-    ).run(search_query)
+    params = {"top_k_results": 5}
+
+    def build(db_tool):
+        from langchain_community.utilities import GoogleScholarAPIWrapper
+        from langchain_community.tools.google_scholar import GoogleScholarQueryRun
+
+        scholar_wrapper = GoogleScholarAPIWrapper(
+            **params,
+            serp_api_key=db_tool.api_key,
+        )
+        return GoogleScholarQueryRun(
+            name="GoogleScholarSearch",
+            api_wrapper=scholar_wrapper,
+            description="Use this tool to find peer-reviewed research papers from Google Scholar.",
+        )
+
+    return await tool_executor.run("google_scholar", search_query, build, params)
 
 @tool
 async def GoogleTrends(search_query: str):
     """Analyze keyword popularity via Google Trends."""
-    db_tool = await get_tool_conf("google_trends")
-    trends_wrapper = GoogleTrendsAPIWrapper(serp_api_key=db_tool.api_key)
-    return GoogleTrendsQueryRun(
-        name="GoogleTrends",
-        api_wrapper=trends_wrapper,
-        description="Use this tool to analyze trending search topics over time or regions.",
-    ).run(search_query)
+    def build(db_tool):
+        from langchain_community.utilities import GoogleTrendsAPIWrapper
+        from langchain_community.tools.google_trends import GoogleTrendsQueryRun
+
+        trends_wrapper = GoogleTrendsAPIWrapper(serp_api_key=db_tool.api_key)
+        return GoogleTrendsQueryRun(
+            name="GoogleTrends",
+            api_wrapper=trends_wrapper,
+            description="Use this tool to analyze trending search topics over time or regions.",
+        )
+
+    return await tool_executor.run("google_trends", search_query, build)
 
 @tool
 async def AskNews(search_query: str):
     """Search current news headlines and articles."""
-    db_tool = await get_tool_conf("asknews")
-    ask_wrapper = AskNewsAPIWrapper(
-        asknews_client_id=db_tool.client_id,
-        asknews_client_secret=db_tool.client_secret,
-    )
-    return AskNewsSearch(
-        name="AskNews",
-        api_wrapper=ask_wrapper,
-        description="Use this tool to search for breaking news and recent media coverage.",
-    ).run(search_query)
+    def build(db_tool):
+        from langchain_community.utilities import AskNewsAPIWrapper
+        from langchain_community.tools import AskNewsSearch
+
+        ask_wrapper = AskNewsAPIWrapper(
+            asknews_client_id=db_tool.client_id,
+            asknews_client_secret=db_tool.client_secret,
+        )
+        return AskNewsSearch(
+            name="AskNews",
+            api_wrapper=ask_wrapper,
+            description="Use this tool to search for breaking news and recent media coverage.",
+        )
+
+    return await tool_executor.run("asknews", search_query, build)
 
 @tool
 async def RedditSearch(search_query: str):
     """Search Reddit posts and comments."""
-    db_tool = await get_tool_conf("reddit")
-    reddit_wrapper = RedditSearchAPIWrapper(
-        reddit_client_id=db_tool.client_id,
-        reddit_client_secret=db_tool.client_secret,
-        reddit_user_agent=db_tool.user_agent,
-    )
-    return RedditSearchRun(
-        name="RedditSearch",
-        api_wrapper=reddit_wrapper,
-        description="Use this tool to search Reddit posts and community discussions.",
-    ).run(search_query)
+    def build(db_tool):
+        from langchain_community.utilities.reddit_search import RedditSearchAPIWrapper
+        from langchain_community.tools import RedditSearchRun
+
+        reddit_wrapper = RedditSearchAPIWrapper(
+            reddit_client_id=db_tool.client_id,
+            reddit_client_secret=db_tool.client_secret,
+            reddit_user_agent=db_tool.user_agent,
+        )
+        return RedditSearchRun(
+            name="RedditSearch",
+            api_wrapper=reddit_wrapper,
+            description="Use this tool to search Reddit posts and community discussions.",
+        )
+
+    return await tool_executor.run("reddit", search_query, build)
 
 @tool
 async def SearxSearch(search_query: str):
     """Perform privacy-friendly web search using Searx."""
-    db_tool = await get_tool_conf("searx")
-    searx_wrapper = SearxSearchWrapper(searx_host=db_tool.host)
-    return SearxSearchRun(
-        name="SearxSearch",
-        wrapper=searx_wrapper,
-        description="Use this tool for privacy-respecting meta search results across multiple engines.",
-    ).run(search_query)
+    def build(db_tool):
+        from langchain_community.utilities import SearxSearchWrapper
+        from langchain_community.tools import SearxSearchRun
+
+        searx_wrapper = SearxSearchWrapper(searx_host=db_tool.host)
+        return SearxSearchRun(
+            name="SearxSearch",
+            wrapper=searx_wrapper,
+            description="Use this tool for privacy-respecting meta search results across multiple engines.",
+        )
+
+    return await tool_executor.run("searx", search_query, build)
 
 @tool
 async def OpenWeather(search_query: str):
     """Query weather data via OpenWeatherMap."""
-    db_tool = await get_tool_conf("openweather")
-    openweather_wrapper = OpenWeatherMapAPIWrapper(openweathermap_api_key=db_tool.api_key)
-    return OpenWeatherMapQueryRun(
-        name="WeatherQuery",
-        api_wrapper=openweather_wrapper,
-        description="Use this tool to get current or forecasted weather information for a given location.",
-    ).run(search_query)
+    def build(db_tool):
+        from langchain_community.utilities.openweathermap import OpenWeatherMapAPIWrapper
+        from langchain_community.tools import OpenWeatherMapQueryRun
+
+        openweather_wrapper = OpenWeatherMapAPIWrapper(openweathermap_api_key=db_tool.api_key)
+        return OpenWeatherMapQueryRun(
+            name="WeatherQuery",
+            api_wrapper=openweather_wrapper,
+            description="Use this tool to get current or forecasted weather information for a given location.",
+        )
+
+    return await tool_executor.run("openweather", search_query, build)